@@ -0,0 +1,298 @@
+"""採点 HTTP/JSON API (ASGI)
+
+    uvicorn api:app --port 8000          # または python api.py [--port 8000]
+
+GET  /score?gender=M&event=100m&mark=10.05
+GET  /performance?gender=M&event=400m&points=1100
+GET  /equivalents?gender=W&points=1000[&events=100m,LJ][&lang=English]
+POST /score:bulk   [{"gender": "M", "event": "100m", "mark": "10.05"}, ...]
+GET  /metrics      (Prometheus テキスト形式の処理時間・キャッシュ集計)
+
+外部サービスに依存せず、app.py と同じ採点表 (*_ALL_*.csv) だけで動く。
+短い時間窓に届いた /score は (性別, 種目) ごとにまとめて 1 回の searchsorted で処理する。
+応答には採点表の版から作った ETag を付け、If-None-Match には 304 を返す。
+event は "long jump" / 走幅跳 / "3000m indoor" などの表記でもよい (resolver.py で列名に揃える)。
+mark は /score と /score:bulk で同じ解析 (records.parse_record_array) を使い、解析できない記録は 400 / null になる。
+"""
+import argparse
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+import numpy as np
+
+import metrics
+from engine import ScoringEngine
+from records import parse_record_array
+
+logger = logging.getLogger("scoring.api")
+
+# ==========================================
+# ★ 同時リクエストのまとめ処理
+# ==========================================
+BATCH_WINDOW = 0.001   # 秒。この間に届いた /score をまとめて検索する
+CACHE_MAX_AGE = 300
+
+
+class ScoreBatcher:
+    """/score の検索を (性別, 種目) ごとに溜め、時間窓の終わりにまとめて検索する"""
+
+    def __init__(self, engine, window=BATCH_WINDOW):
+        self.engine = engine
+        self.window = window
+        self._pending = {}
+        self._scheduled = False
+
+    def submit(self, gender, event, value):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.setdefault((gender, event), []).append((value, fut))
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_later(self.window, self._flush)
+        return fut
+
+    def _flush(self):
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        for (gender, event), items in pending.items():
+            try:
+                idx = self.engine.event_index(gender, event)
+                pos = idx.lookup(np.fromiter((v for v, _ in items), dtype=np.float64, count=len(items)))
+            except Exception as e:
+                for _, fut in items:
+                    if not fut.done(): fut.set_exception(e)
+                continue
+            for (_, fut), p in zip(items, pos):
+                if not fut.done(): fut.set_result((int(idx.points[p]), str(idx.records[p])))
+
+
+# ==========================================
+# ★ HTTP 処理
+# ==========================================
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _param(query, name, required=True):
+    values = query.get(name)
+    if not values or values[0] == "":
+        if required: raise HTTPError(400, f"missing parameter: {name}")
+        return None
+    return values[0]
+
+
+def _gender(engine, query):
+    gender = _param(query, "gender").upper()
+    if gender not in ("M", "W") or not engine.has_table(gender):
+        raise HTTPError(404, f"unknown gender: {gender}")
+    return gender
+
+
+def _event(engine, gender, query):
+    name = _param(query, "event")
+    event = engine.resolve_event(gender, name)
+    if event is None:
+        raise HTTPError(404, f"unknown event: {name}")
+    return event
+
+
+def _bulk_item(item):
+    """一括採点の 1 件を (性別, 種目, 記録) にする。形式が正しくなければ None"""
+    gender, event, mark = item.get("gender"), item.get("event"), item.get("mark")
+    if not isinstance(gender, str) or not isinstance(event, str):
+        return None
+    if isinstance(mark, bool) or not isinstance(mark, (str, int, float)):
+        return None
+    return gender.strip().upper(), event, mark
+
+
+def _int(query, name):
+    try:
+        return int(_param(query, name))
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer")
+
+
+def _mark(query):
+    """記録を /score:bulk と同じ parse_record_array で解析する (正の有限値でなければ 400)"""
+    mark = _param(query, "mark")
+    value = float(parse_record_array(np.array([mark], dtype=object))[0])
+    if not np.isfinite(value) or value <= 0:
+        raise HTTPError(400, f"invalid performance: {mark!r}")
+    return value
+
+
+class ScoringAPI:
+
+    def __init__(self, engine=None):
+        self.engine = engine or ScoringEngine()
+        self.batcher = ScoreBatcher(self.engine)
+        self.routes = {
+            ("GET", "/score"): self.score,
+            ("GET", "/performance"): self.performance,
+            ("GET", "/equivalents"): self.equivalents,
+            ("POST", "/score:bulk"): self.score_bulk,
+        }
+
+    def etag(self, genders):
+        """性別ごとの現在の版から作る ETag (engine.snapshot を通すので新しい表への切り替えも反映される)"""
+        return 'W/"' + "+".join(self.engine.snapshot(g).version for g in genders) + '"'
+
+    # --- エンドポイント ---
+    async def score(self, query, body):
+        gender = _gender(self.engine, query)
+        event = _event(self.engine, gender, query)
+        value = _mark(query)
+        try:
+            points, record = await self.batcher.submit(gender, event, value)
+        except ValueError as e:
+            raise HTTPError(404, str(e))
+        return {"gender": gender, "event": event, "points": points, "table_record": record}, [gender]
+
+    async def performance(self, query, body):
+        gender = _gender(self.engine, query)
+        event = _event(self.engine, gender, query)
+        try:
+            points, record = self.engine.performance_for(gender, event, _int(query, "points"))
+        except ValueError as e:
+            raise HTTPError(404, str(e))
+        return {"gender": gender, "event": event, "points": points, "table_record": record}, [gender]
+
+    async def equivalents(self, query, body):
+        gender = _gender(self.engine, query)
+        points = _int(query, "points")
+        events = _param(query, "events", required=False)
+        lang = _param(query, "lang", required=False)
+        if lang is not None and lang not in ("English", "日本語"):
+            raise HTTPError(400, f"unknown lang: {lang}")
+        if events:
+            events = [self.engine.resolve_event(gender, e) or e for e in events.split(",")]
+        equivalents = self.engine.equivalents(gender, points, events or None, lang)
+        return {"gender": gender, "points": points, "equivalents": equivalents}, [gender]
+
+    async def score_bulk(self, query, body):
+        try:
+            items = json.loads(body or b"[]")
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        if isinstance(items, dict): items = items.get("items", [])
+        if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+            raise HTTPError(400, "body must be a list of {gender, event, mark} objects")
+
+        # 形式の正しくない項目は結果を null にして、他の項目は採点する
+        results = [None] * len(items)
+        parsed = [_bulk_item(i) for i in items]
+        marks = parse_record_array(np.array([p[2] if p else "" for p in parsed], dtype=object))
+        groups = {}
+        for n, p in enumerate(parsed):
+            if p is not None:
+                groups.setdefault(p[:2], []).append(n)
+        for (gender, event), rows in groups.items():
+            try:
+                event = self.engine.resolve_event(gender, event) or event
+                points, records = self.engine.score_many(gender, event, marks[rows])
+            except (KeyError, ValueError, FileNotFoundError):
+                continue
+            # 解析できない記録 (得点 -1) は null のまま
+            for n, p, r in zip(rows, points, records):
+                if p >= 0: results[n] = {"points": int(p), "table_record": str(r)}
+        return {"results": results}, sorted({g for g, _ in groups if g in ("M", "W")})
+
+    # --- ASGI ---
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        if scope["method"] == "POST":
+            while True:
+                msg = await receive()
+                body += msg.get("body", b"")
+                if not msg.get("more_body"): break
+
+        handler = self.routes.get((scope["method"], scope["path"]))
+        headers = dict(scope.get("headers") or [])
+        query = parse_qs(scope.get("query_string", b"").decode("utf-8"))
+        if scope["method"] == "GET" and scope["path"] == "/metrics":
+            await self._send_text(send, 200, metrics.prometheus_text(), "text/plain; version=0.0.4")
+            return
+        if handler is None:
+            await self._send(send, 404, {"error": f"not found: {scope['method']} {scope['path']}"})
+            return
+        # 表の版が変わっていなければ検索せずに 304 (性別の確認と表の更新確認は先に行う)
+        if_none_match = headers.get(b"if-none-match", b"").decode()
+        if scope["method"] == "GET" and if_none_match and "gender" in query:
+            try:
+                etag = self.etag([_gender(self.engine, query)])
+            except HTTPError as e:
+                await self._send(send, e.status, {"error": str(e)})
+                return
+            if if_none_match == etag:
+                await self._send(send, 304, None, etag)
+                return
+        try:
+            with metrics.span("api" + scope["path"].replace("/", ".")):
+                payload, genders = await handler(query, body)
+        except HTTPError as e:
+            await self._send(send, e.status, {"error": str(e)})
+            return
+        except Exception:
+            logger.exception("unhandled error in %s %s", scope["method"], scope["path"])
+            await self._send(send, 500, {"error": "internal server error"})
+            return
+
+        await self._send(send, 200, payload, self.etag(genders) if scope["method"] == "GET" else None)
+
+    async def _send(self, send, status, payload, etag=None):
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = [(b"content-type", b"application/json; charset=utf-8"),
+                   (b"content-length", str(len(body)).encode())]
+        if etag:
+            headers += [(b"etag", etag.encode()), (b"cache-control", f"public, max-age={CACHE_MAX_AGE}".encode())]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _send_text(self, send, status, text, content_type):
+        body = text.encode("utf-8")
+        headers = [(b"content-type", f"{content_type}; charset=utf-8".encode()),
+                   (b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            msg = await receive()
+            if msg["type"] == "lifespan.startup":
+                # 起動時に表を読み込んでおき、最初のリクエストを待たせない
+                for g in ("M", "W"):
+                    self.engine.has_table(g)
+                await send({"type": "lifespan.startup.complete"})
+            elif msg["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = ScoringAPI()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the scoring tables over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Serving the API requires an ASGI server (pip install uvicorn)")
+    uvicorn.run("api:app", host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
 import streamlit as st
 import pandas as pd
-import glob
+import numpy as np
 import os
+import time
+
+from events import CATEGORIES_EN, CATEGORIES_JP, get_display_name
+from batch import score_frame
+from combined import format_mark
+from editions import edition_name
+from engine import ScoringEngine
+import metrics
+import pipeline
+from records import format_display_record
 
 # --- ページ設定 ---
 st.set_page_config(
@@ -53,6 +63,7 @@ TEXT_RES = {
         "result_header": "推定スコア: :blue[{} 点]",
         "input_label": "入力記録: {}",
         "approx_label": "該当するスコア: {}点 (記録: {})",
+        "other_editions": "他の版の採点表: {}",
         "affiliate_header": "🛒 記録向上のための厳選アイテム",
         "affiliate_caption": "※{}選手におすすめのギア",
         "affiliate_common_header": "🥤 全アスリートにおすすめ",
@@ -69,7 +80,25 @@ TEXT_RES = {
         "comp_jumps": "跳躍",
         "comp_throws": "投てき",
         "comp_road": "ロード・競歩",
-        "unit_s": "秒", "unit_m": "m", "unit_pts": "点"
+        "bulk_header": "📂 結果ファイルの一括採点",
+        "bulk_caption": "athlete, gender, event, mark 列を持つ CSV / Parquet をアップロードすると、得点を付けてダウンロードできます。",
+        "bulk_upload": "結果ファイル",
+        "bulk_download": "採点結果をダウンロード (CSV)",
+        "bulk_error": "ファイルを読み込めませんでした: {}",
+        "reverse_header": "🎯 目標得点から記録を逆引き",
+        "reverse_caption": "目標得点 (範囲) に届く記録を種目ごとに表示します。開始と終了を同じにすると 1 点だけ表示します。",
+        "reverse_events": "種目",
+        "reverse_from": "開始 (点)",
+        "reverse_to": "終了 (点)",
+        "reverse_step": "刻み (点)",
+        "reverse_download": "進行表をダウンロード (CSV)",
+        "combined_header": "🧮 混成競技 計算機",
+        "combined_caption": "各種目の記録を入力してください (未実施の種目は空欄)。例: 10.55 / 7.80 / 4:36.11",
+        "combined_total": "合計: {} 点 (採点表: {} pts)",
+        "combined_target": "目標合計",
+        "combined_needed": "残り種目で必要な記録 (均等割り)",
+        "combined_unreachable": "この目標合計には届きません (「-」の種目は必要な得点が現実的な範囲を超えています)",
+        "unit_pts": "点"
     },
     "English": {
         "caption": "Calculate points based on World Athletics Scoring Tables.",
@@ -85,6 +114,7 @@ TEXT_RES = {
         "result_header": "Estimated Score: :blue[{} pts]",
         "input_label": "Input: {}",
         "approx_label": "Score found: {} pts (Record: {})",
+        "other_editions": "Other table editions: {}",
         "affiliate_header": "🛒 Recommended Gear",
         "affiliate_caption": "※Gear for {} athletes",
         "affiliate_common_header": "🥤 For All Athletes",
@@ -101,19 +131,28 @@ TEXT_RES = {
         "comp_jumps": "Jumps",
         "comp_throws": "Throws",
         "comp_road": "Road / Race Walk",
-        "unit_s": "s", "unit_m": "m", "unit_pts": "pts"
+        "bulk_header": "📂 Bulk Scoring",
+        "bulk_caption": "Upload a CSV / Parquet file with athlete, gender, event and mark columns to download it with points added.",
+        "bulk_upload": "Results file",
+        "bulk_download": "Download scored results (CSV)",
+        "bulk_error": "Could not read the file: {}",
+        "reverse_header": "🎯 Points → Mark (Reverse Lookup)",
+        "reverse_caption": "Shows the mark needed in each event to reach the target score (or range). Set From and To equal for a single score.",
+        "reverse_events": "Events",
+        "reverse_from": "From (pts)",
+        "reverse_to": "To (pts)",
+        "reverse_step": "Step (pts)",
+        "reverse_download": "Download progression table (CSV)",
+        "combined_header": "🧮 Combined Events Calculator",
+        "combined_caption": "Enter the mark for each event (leave blank if not yet held). e.g. 10.55 / 7.80 / 4:36.11",
+        "combined_total": "Total: {} points (Scoring Table: {} pts)",
+        "combined_target": "Target total",
+        "combined_needed": "Marks needed in the remaining events (even split)",
+        "combined_unreachable": "This target total is out of reach (events shown as \"-\" would need more points than is realistically possible)",
+        "unit_pts": "pts"
     }
 }
 
-CATEGORIES_JP = [
-    "短距離・ハードル・リレー", "中長距離・障害", "跳躍", "投てき",
-    "競歩（トラック）", "ロード（長距離・競歩）", "混成競技"
-]
-CATEGORIES_EN = [
-    "Sprints, Hurdles & Relays", "Middle/Long Distance", "Jumps", "Throws",
-    "Race Walking (Track)", "Road Running & Walking", "Combined Events"
-]
-
 def get_text(key, lang_code):
     return TEXT_RES[lang_code][key]
 
@@ -169,166 +208,72 @@ def show_affiliate_links(category_name, lang_code):
     with col1: show_simple_card("👟", i1[0], i1[1], i1[2], lang_code)
     with col2: show_simple_card("🩹", i2[0], i2[1], i2[2], lang_code)
 
-# ==========================================
-# ★ 種目処理ロジック & 辞書
-# ==========================================
-EVENT_TRANSLATION_JP = {
-    "50m": "50m", "60m": "60m", "100m": "100m", "200m": "200m", "400m": "400m",
-    "800m": "800m", "1500m": "1500m", "3000m": "3000m", "5000m": "5000m", "10000m": "10000m",
-    "110mH": "110mH", "100mH": "100mH", "400mH": "400mH", "3000m SC": "3000m障害",
-    "HJ": "走高跳", "PV": "棒高跳", "LJ": "走幅跳", "TJ": "三段跳",
-    "SP": "砲丸投", "DT": "円盤投", "HT": "ハンマー投", "JT": "やり投",
-    "Dec.": "十種競技", "Hept.": "七種競技", "Pent.": "五種競技",
-    "Marathon": "マラソン", "HM": "ハーフマラソン", "20km W": "20km競歩", "35km W": "35km競歩", "50km W": "50km競歩"
-}
-# 並び順指定
-CUSTOM_SORT_ORDER = [
-    "100m", "200m", "400m", "800m", "1500m", "5000m", "10000m",
-    "110mH", "100mH", "400mH", "3000m SC",
-    "HJ", "PV", "LJ", "TJ", "SP", "DT", "HT", "JT",
-    "Dec.", "Hept.", "Pent.", "Marathon", "HM", "20km W"
-]
-OLYMPIC_EVENTS_FOR_COMPARE = [
-    "100m", "200m", "400m", "800m", "1500m", "5000m", "10000m",
-    "110mH", "100mH", "400mH", "3000m SC",
-    "HJ", "PV", "LJ", "TJ", "SP", "DT", "HT", "JT", "Marathon", "20km W"
-]
-
-def get_display_name(raw_name, lang_code):
-    base_name = raw_name.replace(" sh", " (ST)")
-    if lang_code == "日本語":
-        return EVENT_TRANSLATION_JP.get(raw_name, base_name)
-    return base_name
-
-def classify_event(event_name_jp):
-    name = event_name_jp
-    if "種競技" in name: return "混成競技"
-    if "跳" in name and "競歩" not in name: return "跳躍"
-    if "投" in name: return "投てき"
-    if "m競歩" in name and "km" not in name and "マラソン" not in name: return "競歩（トラック）"
-    if "ロード" in name or "マラソン" in name or "km競歩" in name: return "ロード（長距離・競歩）"
-    if any(k in name for k in ["800m", "1000m", "1500m", "2000m", "3000m", "5000m", "10000m", "マイル", "障害"]): return "中長距離・障害"
-    return "短距離・ハードル・リレー"
-
-def classify_event_en(event_name_en):
-    name = event_name_en.lower()
-    if "dec" in name or "hept" in name or "pent" in name: return "Combined Events"
-    if any(k in name for k in ["hj", "pv", "lj", "tj", "standing"]) and "standing" not in name: return "Jumps"
-    if any(k in name for k in ["sp", "dt", "ht", "jt", "wt"]): return "Throws"
-    if "mw" in name and "km" not in name: return "Race Walking (Track)"
-    if any(k in name for k in ["marathon", "hm", "km", "road", "miles"]): return "Road Running & Walking"
-    if any(k in name for k in ["800m", "1500m", "3000m", "5000m", "10000m", "mile", "sc"]): return "Middle/Long Distance"
-    return "Sprints, Hurdles & Relays"
-
-def get_event_type(event_name):
-    name = event_name.lower().strip()
-    if any(k in name for k in ['hj', 'pv', 'lj', 'tj', 'sp', 'dt', 'ht', 'jt', 'shot', 'disc', 'jave', 'hamm', 'jump', 'throw', 'wt']) and "dec" not in name: return "field"
-    if "dec" in name or "hept" in name or "pts" in name: return "score"
-    if any(k in name for k in ['marathon', 'km w', 'marw', 'hmw', '15 km', '20 km', '25 km', '30 km', '35 km', '50 km', '100 km']): return "time_hms"
-    if any(k in name for k in ['800m', '1000m', '1500m', '2000m', '3000m', '5000m', '10000m', 'mile', 'sc', '4x']): return "time_ms"
-    return "time_s"
-
-def parse_record_from_csv(record_str):
-    if pd.isna(record_str) or str(record_str).strip() in ["-", ""]: return None
-    s = str(record_str).strip()
-    try:
-        if ":" in s:
-            parts = s.split(":")
-            if len(parts) == 3: return float(parts[0])*3600 + float(parts[1])*60 + float(parts[2])
-            elif len(parts) == 2: return float(parts[0])*60 + float(parts[1])
-        return float(s)
-    except: return None
-
-def format_display_record(val, mode, lang_code):
-    if pd.isna(val) or val == "-" or val == "": return "-"
-    u_s = get_text("unit_s", lang_code)
-    u_m = get_text("unit_m", lang_code)
-    if mode == "time_s":
-        try: return f"{float(val):.2f}{u_s}"
-        except: return f"{val}{u_s}"
-    elif mode == "field": return f"{val}{u_m}"
-    return str(val)
-
 # --- データの読み込み ---
-@st.cache_data
+# 採点エンジンはプロセスに 1 つだけ作り、全セッションで共有する
+# (CSV は初回のみ解析し、以降はバイナリキャッシュ (mmap) を開くだけ。
+#  新しい日付の *_ALL_*.csv が置かれると、再起動なしで次の操作から新しい版に切り替わる)
+@st.cache_resource
+def get_engine():
+    return ScoringEngine()
+
+@metrics.timed("app.load_data")
 def load_data(gender_prefix):
-    file_pattern = f"{gender_prefix}_ALL_*.csv"
-    csv_files = sorted(glob.glob(file_pattern))
-    if not csv_files: return None, None
     try:
-        df = pd.read_csv(csv_files[-1], dtype=str)
-        p_col = [c for c in df.columns if c.lower() in ["points", "pts", "score"]][0]
-        df["Points_Num"] = pd.to_numeric(df[p_col].str.replace(',', ''), errors='coerce').fillna(0).astype(int)
-        return df, p_col
-    except: return None, None
+        return get_engine().table(gender_prefix)
+    except Exception: return None
 
 # ==========================================
 # ★ メインアプリ
 # ==========================================
+run_spans, run_start = metrics.collect(), time.perf_counter()
 st.title("World Athletics Scoring Calculator / スコア検索ツール")
 st.caption("Calculate points based on World Athletics Scoring Tables. / 世界陸連採点表に基づくスコア検索")
 
 cols = st.columns(2)
 with cols[0]: lang_choice = st.radio("Language / 言語", ["English", "日本語"], horizontal=True)
 with cols[1]:
-    gender_choice = st.radio(get_text("select_gender", lang_choice), [get_text("men", lang_choice), get_text("women", lang_choice)], horizontal=True)
-    gender_prefix = "M" if ("Men" in gender_choice or "男子" in gender_choice) else "W"
+    gender_prefix = st.radio(get_text("select_gender", lang_choice), ["M", "W"], horizontal=True, key="gender",
+                             format_func=lambda g: get_text("men" if g == "M" else "women", lang_choice))
 
-df, points_col = load_data(gender_prefix)
+engine = get_engine()
+table = load_data(gender_prefix)
 
-if df is not None:
-    raw_event_list = [c for c in df.columns if c not in [points_col, "Points_Num"]]
-    
+if table is not None:
     # ----------------------------------------------------
-    # ★ 種目カテゴリ分け & ソートロジック (復活)
+    # ★ 種目カテゴリ分け & ソート (性別・言語・データ版ごとにキャッシュ済み)
     # ----------------------------------------------------
-    all_events_map = {}
-    if lang_choice == "日本語":
-        categorized_events = {cat: [] for cat in CATEGORIES_JP}
-        for eng_name in raw_event_list:
-            disp_name = get_display_name(eng_name, "日本語")
-            all_events_map[disp_name] = eng_name
-            cat = classify_event(disp_name)
-            if cat in categorized_events: categorized_events[cat].append(disp_name)
-            else: categorized_events["短距離・ハードル・リレー"].append(disp_name)
-        current_categories = CATEGORIES_JP
-    else:
-        categorized_events = {cat: [] for cat in CATEGORIES_EN}
-        for eng_name in raw_event_list:
-            disp_name = get_display_name(eng_name, "English")
-            all_events_map[disp_name] = eng_name
-            cat = classify_event_en(eng_name)
-            if cat in categorized_events: categorized_events[cat].append(disp_name)
-            else: categorized_events["Sprints, Hurdles & Relays"].append(disp_name)
-        current_categories = CATEGORIES_EN
-
-    # カテゴリ内ソート
-    for cat in categorized_events:
-        categorized_events[cat].sort()
-        # 主要種目を先頭に
-        priority = []
-        others = []
-        for d_name in categorized_events[cat]:
-            orig = all_events_map[d_name]
-            clean = orig.replace(" sh", "")
-            if clean in CUSTOM_SORT_ORDER: priority.append(d_name)
-            else: others.append(d_name)
-        priority.sort(key=lambda x: CUSTOM_SORT_ORDER.index(all_events_map[x].replace(" sh", "")))
-        categorized_events[cat] = priority + others
+    catalogue = engine.catalogue(gender_prefix, lang_choice)
+    current_categories = catalogue.categories
+    categorized_events = catalogue.events_in
 
     # UI描画
-    selected_category = st.radio(get_text("select_category", lang_choice), current_categories, horizontal=True)
+    # 選択肢は言語に依存しない値 (カテゴリの番号・元の列名) にして表示名は format_func で付ける。
+    # 言語を切り替えても選択中の種目がそのまま残り、計算結果も表示し続けられる
+    raw_events_in = [[catalogue.raw_name(d) for d in categorized_events[cat]] for cat in current_categories]
+    prev_event = st.session_state.get("event")
+    if st.session_state.get("catalogue_lang") != lang_choice:
+        st.session_state["catalogue_lang"] = lang_choice
+        # 言語によってカテゴリの分け方が違う種目もあるので、選択中の種目のカテゴリに合わせる
+        if prev_event in catalogue.entries:
+            st.session_state["category"] = current_categories.index(catalogue.entry(prev_event).category)
+    category_idx = st.radio(get_text("select_category", lang_choice), range(len(current_categories)), horizontal=True,
+                            key="category", format_func=lambda i: current_categories[i])
+    selected_category = current_categories[category_idx]
     events_in_cat = categorized_events[selected_category]
-    
+    # 性別やカテゴリを変えて選択中の種目が選択肢から外れたら先頭に戻す
+    if prev_event is not None and prev_event not in raw_events_in[category_idx]:
+        del st.session_state["event"]
+
     if not events_in_cat:
         st.warning(get_text("no_category_data", lang_choice))
-        selected_label = None
+        selected_event_raw = None
     else:
-        selected_label = st.selectbox(get_text("select_event", lang_choice), events_in_cat)
-    
+        selected_event_raw = st.selectbox(get_text("select_event", lang_choice), raw_events_in[category_idx], key="event",
+                                          format_func=lambda raw: catalogue.entry(raw).display)
+    selected_label = catalogue.entry(selected_event_raw).display if selected_event_raw else None
+
     if selected_label:
-        selected_event_raw = all_events_map[selected_label]
-        mode = get_event_type(selected_event_raw)
+        mode = catalogue.entry(selected_event_raw).mode
         
         st.markdown("---")
         st.subheader(get_text("input_header", lang_choice).format(selected_label))
@@ -339,96 +284,81 @@ if df is not None:
         
         # 入力フォーム
         if mode == "field":
-            m = in_cols[0].number_input(get_text("label_m", lang_choice), min_value=0, value=0)
-            cm = in_cols[1].number_input(get_text("label_cm", lang_choice), min_value=0, max_value=99, value=0)
+            m = in_cols[0].number_input(get_text("label_m", lang_choice), min_value=0, value=0, key=f"input_{mode}_m")
+            cm = in_cols[1].number_input(get_text("label_cm", lang_choice), min_value=0, max_value=99, value=0, key=f"input_{mode}_cm")
             user_val = m + (cm / 100.0)
             disp_input = f"{m}m {cm}cm"
         elif mode == "time_hms":
-            h = in_cols[0].number_input(get_text("label_h", lang_choice), 0)
-            m = in_cols[1].number_input(get_text("label_min", lang_choice), 0, 59)
-            s = in_cols[2].number_input(get_text("label_sec", lang_choice), 0, 59)
-            cs = in_cols[3].number_input(get_text("label_cs", lang_choice), 0, 99)
+            h = in_cols[0].number_input(get_text("label_h", lang_choice), 0, key=f"input_{mode}_h")
+            m = in_cols[1].number_input(get_text("label_min", lang_choice), 0, 59, key=f"input_{mode}_min")
+            s = in_cols[2].number_input(get_text("label_sec", lang_choice), 0, 59, key=f"input_{mode}_sec")
+            cs = in_cols[3].number_input(get_text("label_cs", lang_choice), 0, 99, key=f"input_{mode}_cs")
             user_val = h*3600 + m*60 + s + cs/100.0
             disp_input = f"{h}:{m:02}:{s:02}.{cs:02}"
         elif mode == "time_ms":
-            m = in_cols[0].number_input(get_text("label_min", lang_choice), 0)
-            s = in_cols[1].number_input(get_text("label_sec", lang_choice), 0, 59)
-            cs = in_cols[2].number_input(get_text("label_cs", lang_choice), 0, 99)
+            m = in_cols[0].number_input(get_text("label_min", lang_choice), 0, key=f"input_{mode}_min")
+            s = in_cols[1].number_input(get_text("label_sec", lang_choice), 0, 59, key=f"input_{mode}_sec")
+            cs = in_cols[2].number_input(get_text("label_cs", lang_choice), 0, 99, key=f"input_{mode}_cs")
             user_val = m*60 + s + cs/100.0
             disp_input = f"{m}:{s:02}.{cs:02}"
         else:
-            s = in_cols[0].number_input(get_text("label_sec", lang_choice), 0)
-            cs = in_cols[1].number_input(get_text("label_cs", lang_choice), 0, 99)
+            s = in_cols[0].number_input(get_text("label_sec", lang_choice), 0, key=f"input_{mode}_sec")
+            cs = in_cols[1].number_input(get_text("label_cs", lang_choice), 0, 99, key=f"input_{mode}_cs")
             user_val = s + cs/100.0
             disp_input = f"{s}.{cs:02}s"
 
+        # 計算ボタンで確定した入力を session_state に覚えておき、
+        # 言語の切り替えなど他の操作で再実行されても入力が同じ間は結果を表示し続ける
+        calc_key = (gender_prefix, selected_event_raw, user_val)
         if st.button(get_text("calc_button", lang_choice), type="primary"):
+            st.session_state["calc_key"] = calc_key
+        if st.session_state.get("calc_key") == calc_key:
             if user_val <= 0:
                 st.warning(get_text("warning_input", lang_choice))
             else:
                 # ---------------------------------------------------------
                 # ★ 検索 & 前後スコア取得ロジック (強化版)
                 # ---------------------------------------------------------
-                # 1. 選択種目の有効なデータのみを抽出した clean_df を作成
-                #    インデックスをリセットすることで、スライス(iloc)による前後取得を容易にする
-                clean_df = df[df[selected_event_raw].str.strip() != "-"].copy()
-                clean_df['val'] = clean_df[selected_event_raw].apply(parse_record_from_csv)
-                clean_df = clean_df.dropna(subset=['val']).sort_values("Points_Num", ascending=False).reset_index(drop=True)
+                # 1. 選択種目のインデックス (得点降順・解析済み) を二分探索
+                #    フィールド: 入力値以下の最大記録 / トラック: 入力値以上の最小記録（遅い方）
+                #    結果は (性別, 種目, 記録, 版) ごとにメモ化 (pipeline)
+                try:
+                    result = pipeline.match(engine, gender_prefix, selected_event_raw, user_val)
+                except ValueError:
+                    result = None
                 
-                if clean_df.empty:
+                if result is None:
                     st.error("No valid data for this event.")
                 else:
-                    # スコア検索 (近似値)
-                    if mode == "field":
-                        # フィールド: 入力値以下の最大記録
-                        candidates = clean_df[clean_df['val'] <= user_val]
-                        best_match_idx = candidates.index[0] if not candidates.empty else clean_df.index[-1]
-                    else:
-                        # トラック: 入力値以上の最小記録（遅い方）
-                        candidates = clean_df[clean_df['val'] >= user_val]
-                        best_match_idx = candidates.index[0] if not candidates.empty else clean_df.index[-1]
-                    
-                    match_row = clean_df.iloc[best_match_idx]
-                    score = int(match_row["Points_Num"])
-                    table_rec = match_row[selected_event_raw]
+                    score = result.score
+                    table_rec = result.record
 
-                    st.divider()
-                    st.subheader(get_text("result_header", lang_choice).format(score))
-                    st.write(get_text("input_label", lang_choice).format(disp_input))
-                    st.caption(get_text("approx_label", lang_choice).format(score, format_display_record(table_rec, mode, lang_choice)))
+                    with metrics.span("render.result"):
+                        st.divider()
+                        st.subheader(get_text("result_header", lang_choice).format(score))
+                        st.write(get_text("input_label", lang_choice).format(disp_input))
+                        st.caption(get_text("approx_label", lang_choice).format(score, format_display_record(table_rec, mode, lang_choice)))
+                        # 過去の版の採点表が置いてあれば、同じ記録の得点を並べて表示
+                        other_editions = [e for e in engine.editions.names(gender_prefix) if e != edition_name(table.source)]
+                        if other_editions:
+                            by_edition = engine.editions.score(gender_prefix, selected_event_raw, user_val, other_editions)
+                            st.caption(get_text("other_editions", lang_choice).format(
+                                ", ".join(f"{e}: {r[0]} pts" for e, r in by_edition.items() if r is not None)))
 
-                    # === 1. 前後3つの記録表示 (clean_dfからインデックスで取得) ===
-                    st.markdown(f"**{get_text('nearby_scores', lang_choice)}**")
-                    
-                    # 前後3行の範囲を計算
-                    start_idx = max(0, best_match_idx - 3)
-                    end_idx = min(len(clean_df), best_match_idx + 4) # sliceは末尾を含まないので+4
-                    
-                    nearby_rows = clean_df.iloc[start_idx:end_idx]
-                    
-                    nearby_list = []
-                    for i, r in nearby_rows.iterrows():
-                        p = int(r["Points_Num"])
-                        # 該当行にマークをつける
-                        prefix = "👉 " if i == best_match_idx else ""
-                        nearby_list.append({
-                            "Score": f"{prefix}{p}", 
-                            "Record": format_display_record(r[selected_event_raw], mode, lang_choice)
-                        })
-                    
-                    st.table(pd.DataFrame(nearby_list).set_index("Score"))
+                    # === 1. 前後3つの記録表示 (インデックスの配列をスライス) ===
+                    with metrics.span("render.nearby"):
+                        st.markdown(f"**{get_text('nearby_scores', lang_choice)}**")
+                        
+                        # 該当行に印を付けた前後の行 (検索結果と言語ごとにメモ化)
+                        nearby_list = pipeline.nearby_rows(result, lang_choice)
+                        
+                        st.table(pd.DataFrame(nearby_list).set_index("Score"))
 
                     # ---------------------------------------------------------
                     # ★ 2. 同スコア比較 (主要種目リスト復活)
                     # ---------------------------------------------------------
-                    st.markdown(f"**{get_text('comparison_header', lang_choice)}** ({score} pts)")
-                    
-                    # 元のデータ(df)全体から、特定したスコアの行を取得
-                    orig_score_row = df[df["Points_Num"] == score]
-                    
-                    if not orig_score_row.empty:
-                        rd = orig_score_row.iloc[0]
-                        c1, c2 = st.columns(2)
+                    with metrics.span("render.comparison"):
+                        st.markdown(f"**{get_text('comparison_header', lang_choice)}** ({score} pts)")
                         
                         sprints = ["100m", "200m", "400m", "110mH", "100mH", "400mH"]
                         middle = ["800m", "1500m", "5000m", "10000m", "3000m SC"]
@@ -436,22 +366,128 @@ if df is not None:
                         throws = ["SP", "DT", "HT", "JT"]
                         road = ["Marathon", "20km W"] 
                         
-                        def show_comp(col, title, ev_list):
-                            with col:
-                                st.caption(f"▼ {title}")
-                                for e in ev_list:
-                                    if e in df.columns and pd.notna(rd[e]) and rd[e] != "-":
-                                        d_name = get_display_name(e, lang_choice)
-                                        e_mode = get_event_type(e)
-                                        val_disp = format_display_record(rd[e], e_mode, lang_choice)
-                                        st.markdown(f"- **{d_name}**: {val_disp}")
+                        # 採点表全体から、特定したスコアの行の各種目記録を取得
+                        equivalents = pipeline.equivalents(engine, gender_prefix, score, sprints + middle + jumps + throws + road, lang_choice)
+                        
+                        if equivalents:
+                            c1, c2 = st.columns(2)
+                            
+                            def show_comp(col, title, ev_list):
+                                with col:
+                                    st.caption(f"▼ {title}")
+                                    for e in ev_list:
+                                        val_disp = equivalents.get(e)
+                                        if val_disp is not None:
+                                            d_name = get_display_name(e, lang_choice)
+                                            st.markdown(f"- **{d_name}**: {val_disp}")
 
-                        show_comp(c1, get_text("comp_sprints", lang_choice), sprints)
-                        show_comp(c1, get_text("comp_middle", lang_choice), middle)
-                        show_comp(c2, get_text("comp_jumps", lang_choice), jumps)
-                        show_comp(c2, get_text("comp_throws", lang_choice), throws)
-                        show_comp(c1, get_text("comp_road", lang_choice), road)
+                            show_comp(c1, get_text("comp_sprints", lang_choice), sprints)
+                            show_comp(c1, get_text("comp_middle", lang_choice), middle)
+                            show_comp(c2, get_text("comp_jumps", lang_choice), jumps)
+                            show_comp(c2, get_text("comp_throws", lang_choice), throws)
+                            show_comp(c1, get_text("comp_road", lang_choice), road)
                     
-                    show_affiliate_links(selected_category, lang_choice)
+                    with metrics.span("render.affiliate"):
+                        show_affiliate_links(selected_category, lang_choice)
+
+        # ----------------------------------------------------
+        # ★ 混成競技: 種目別の記録から得点・合計・目標までの必要記録
+        # ----------------------------------------------------
+        try:
+            program = engine.combined(gender_prefix, selected_event_raw)
+        except ValueError:
+            program = None
+        if program is not None:
+            with metrics.span("render.combined"), st.expander(get_text("combined_header", lang_choice)):
+                st.caption(get_text("combined_caption", lang_choice))
+                mark_cols = st.columns(5)
+                mark_inputs = [mark_cols[j % 5].text_input(get_display_name(d, lang_choice), key=f"combined_{gender_prefix}_{selected_event_raw}_{d}")
+                               for j, d in enumerate(program.disciplines)]
+                marks = program.parse(mark_inputs)
+                pts = program.score(marks)
+                total = int(pts.sum())
+                st.table(pd.DataFrame({
+                    "Mark": [format_mark(m, k) for m, k in zip(marks, program.kinds)],
+                    "Points": pts,
+                    "Total": pts.cumsum(),
+                }, index=[get_display_name(d, lang_choice) for d in program.disciplines]))
+                table_pts = engine.score(gender_prefix, selected_event_raw, total)[0] if total > 0 else 0
+                st.markdown(f"**{get_text('combined_total', lang_choice).format(total, table_pts)}**")
+
+                remaining = np.isnan(marks)
+                if remaining.any():
+                    target = st.number_input(get_text("combined_target", lang_choice), min_value=0, value=max(total, 1000 * len(program) * 4 // 5), step=100)
+                    need_pts, need = program.needed(marks, target)
+                    st.markdown(f"**{get_text('combined_needed', lang_choice)}**")
+                    st.table(pd.DataFrame({
+                        "Mark": [format_mark(need[j], program.kinds[j]) for j in np.flatnonzero(remaining)],
+                        "Points": need_pts[remaining].astype(int),
+                    }, index=[get_display_name(program.disciplines[j], lang_choice) for j in np.flatnonzero(remaining)]))
+                    if np.isnan(need[remaining]).any():
+                        st.warning(get_text("combined_unreachable", lang_choice))
+
+    # ----------------------------------------------------
+    # ★ 逆引き: 目標得点 → 各種目の必要記録 (進行表)
+    # ----------------------------------------------------
+    with metrics.span("render.reverse"), st.expander(get_text("reverse_header", lang_choice)):
+        st.caption(get_text("reverse_caption", lang_choice))
+        all_labels = [d for cat in current_categories for d in categorized_events[cat]]
+        rev_labels = st.multiselect(get_text("reverse_events", lang_choice), all_labels,
+                                    default=[selected_label] if selected_label else events_in_cat[:3])
+        rev_cols = st.columns(3)
+        p_from = rev_cols[0].number_input(get_text("reverse_from", lang_choice), min_value=0, max_value=1400, value=1000, step=10)
+        p_to = rev_cols[1].number_input(get_text("reverse_to", lang_choice), min_value=0, max_value=1400, value=1200, step=10)
+        p_step = rev_cols[2].number_input(get_text("reverse_step", lang_choice), min_value=1, max_value=500, value=10)
+        if rev_labels:
+            lo, hi = min(p_from, p_to), max(p_from, p_to)
+            prog_df = engine.progression(gender_prefix, range(hi, lo - 1, -p_step),
+                                         [catalogue.raw_name(d) for d in rev_labels], lang_choice)
+            prog_df.columns = rev_labels
+            st.dataframe(prog_df, use_container_width=True)
+            st.download_button(get_text("reverse_download", lang_choice), prog_df.to_csv().encode("utf-8-sig"),
+                               file_name=f"progression_{gender_prefix}_{lo}-{hi}.csv", mime="text/csv")
+
+    # ----------------------------------------------------
+    # ★ 結果ファイルの一括採点
+    # ----------------------------------------------------
+    with metrics.span("render.bulk"), st.expander(get_text("bulk_header", lang_choice)):
+        st.caption(get_text("bulk_caption", lang_choice))
+        uploaded = st.file_uploader(get_text("bulk_upload", lang_choice), type=["csv", "parquet"])
+        if uploaded is not None:
+            try:
+                if uploaded.name.lower().endswith(".parquet"):
+                    results_df = pd.read_parquet(uploaded)
+                else:
+                    results_df = pd.read_csv(uploaded, dtype=str)
+                scored_df = score_frame(engine, results_df)
+            except Exception as e:
+                st.error(get_text("bulk_error", lang_choice).format(e))
+            else:
+                st.dataframe(scored_df.head(100), use_container_width=True)
+                st.download_button(get_text("bulk_download", lang_choice), scored_df.to_csv(index=False).encode("utf-8"),
+                                   file_name=f"scored_{os.path.splitext(uploaded.name)[0]}.csv", mime="text/csv")
 else:
     st.error("Data file not found.")
+
+# ==========================================
+# ★ 計測パネル (URL に ?debug=1 を付けたときだけ表示)
+# ==========================================
+metrics.record("app.run", time.perf_counter() - run_start)
+if st.query_params.get("debug") == "1":
+    with st.expander("🛠 Debug: timings & cache counters"):
+        if not metrics.ENABLED:
+            st.caption("Instrumentation is disabled (SCORING_METRICS=0).")
+        st.caption("This run")
+        if run_spans:
+            st.table(pd.DataFrame(run_spans, columns=["Span", "ms"]).assign(ms=lambda d: (d["ms"] * 1e3).round(3)))
+        snap = metrics.snapshot()
+        st.caption("Process totals")
+        if snap["spans"]:
+            st.dataframe(pd.DataFrame(snap["spans"]).T.assign(
+                total_ms=lambda d: d["total"] * 1e3, mean_ms=lambda d: d["mean"] * 1e3, max_ms=lambda d: d["max"] * 1e3
+            )[["count", "total_ms", "mean_ms", "max_ms"]].round(3), use_container_width=True)
+        if snap["counters"]:
+            st.table(pd.Series(snap["counters"], name="count"))
+        dl = st.columns(2)
+        dl[0].download_button("Prometheus text", metrics.prometheus_text(), file_name="scoring_metrics.prom", mime="text/plain")
+        dl[1].download_button("JSON lines", metrics.json_lines(), file_name="scoring_metrics.jsonl", mime="application/x-ndjson")
@@ -0,0 +1,279 @@
+"""大会結果ファイルの一括採点
+
+    python batch.py results.csv -o scored.csv [--chunksize 100000] [--data-dir .] [--editions 20240101 20260112]
+    python batch.py archive/*.parquet -o scored.parquet --workers 0      # 全コアで並列
+
+入力は athlete, gender, event, mark 列を持つ CSV / Parquet。
+チャンク単位で読み込み、(性別, 種目) ごとにまとめて searchsorted で採点し、
+points / table_record 列を追加して逐次書き出す。種目名は英語・日本語の表記ゆれも
+採点表の列名に揃え (resolver.py)、対応づけた列名を table_event 列に入れる。
+--editions を指定すると、版ごとの得点 points_<版> 列も追加する (過去の版での再採点用)。
+--workers でチャンクをプロセスプールに振り分ける。各ワーカーは .score_cache の
+.npy を mmap で開くので、採点表のページは全プロセスで共有され CSV の解析もしない。
+同時に処理中のチャンク数には上限があり、出力は入力と同じ順で逐次書き出す。
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from editions import find_editions
+from engine import GENDERS, ScoringEngine
+from records import parse_record_array
+from table_cache import find_table_file, load_table
+
+# ==========================================
+# ★ 一括採点
+# ==========================================
+REQUIRED_COLUMNS = ["gender", "event", "mark"]
+DEFAULT_CHUNKSIZE = 100_000
+
+GENDER_ALIASES = {
+    "m": "M", "men": "M", "man": "M", "male": "M", "男子": "M", "男": "M",
+    "w": "W", "women": "W", "woman": "W", "female": "W", "f": "W", "女子": "W", "女": "W",
+}
+
+
+def normalize_gender(value):
+    return GENDER_ALIASES.get(str(value).strip().lower())
+
+
+def _lookup_groups(index_for, groups, marks):
+    """(性別, 種目) ごとにまとめて検索し、(得点, 採点表の記録) の配列を返す。
+
+    index_for(性別) は ScoringIndex (表が無ければ None) を返す関数。
+    """
+    points = np.full(len(marks), np.nan)
+    records = np.full(len(marks), "", dtype=object)
+    for (gender, event), rows in groups.items():
+        index = index_for(gender) if gender is not None else None
+        if index is None or event not in index:
+            continue
+        idx = index[event]
+        if idx.empty:
+            continue
+        vals = marks[rows]
+        ok = np.isfinite(vals) & (vals > 0)
+        if not ok.any():
+            continue
+        pos = idx.lookup(vals[ok])
+        points[rows[ok]] = idx.points[pos]
+        records[rows[ok]] = idx.records[pos]
+    return points, records
+
+
+def _table_event(engine, gender, event):
+    """入力の種目名を採点表の列名に揃える (解決できなければ None)"""
+    if gender is None or not engine.has_table(gender):
+        return None
+    return engine.resolve_event(gender, event)
+
+
+def score_frame(engine, df, editions=None):
+    """gender / event / mark 列を持つ DataFrame に points, table_record, table_event 列を追加して返す
+
+    種目名は英語・日本語の表記ゆれも採点表の列名に揃える (resolver.EventResolver)。
+    table_event は対応づけた列名 (解決できなければ空)。
+    editions (版の名前の並び) を指定すると、版ごとの points_<版> 列も追加する。
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"missing columns: {', '.join(missing)}")
+
+    marks = parse_record_array(df["mark"].to_numpy(dtype=object))
+    # 表記ゆれの正規化はユニーク値に対してだけ行う
+    groups = {}
+    table_events = np.full(len(df), "", dtype=object)
+    for (gender, event), rows in df.groupby(["gender", "event"], sort=False, dropna=True).indices.items():
+        gender = normalize_gender(gender)
+        column = _table_event(engine, gender, event)
+        if column is not None:
+            table_events[rows] = column
+        key = (gender, column or str(event).strip())
+        groups[key] = np.concatenate([groups[key], rows]) if key in groups else rows
+
+    points, records = _lookup_groups(lambda g: engine.index(g) if engine.has_table(g) else None, groups, marks)
+    out = df.copy()
+    out["points"] = pd.Series(points, index=df.index).astype("Int64")
+    out["table_record"] = records
+    out["table_event"] = table_events
+    for name in editions or []:
+        def edition_index(g, name=name):
+            return engine.editions.get(g, name).index if name in engine.editions.names(g) else None
+        ed_points, _ = _lookup_groups(edition_index, groups, marks)
+        out[f"points_{name}"] = pd.Series(ed_points, index=df.index).astype("Int64")
+    return out
+
+
+# --- 入出力 (チャンク単位) ---
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in [".parquet", ".pq"]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("Parquet input/output requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    if _is_parquet(path):
+        pa = _require_pyarrow()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, dtype={"athlete": str, "gender": str, "event": str, "mark": str},
+                               chunksize=chunksize)
+
+
+def encode_chunk(df, path):
+    """採点済みチャンクを出力形式に変換する (Parquet は pyarrow.Table、CSV はヘッダ無しの文字列)。
+
+    並列採点ではワーカー側で呼び、親プロセスは書き込むだけにする。
+    """
+    if _is_parquet(path):
+        return _require_pyarrow().Table.from_pandas(df, preserve_index=False)
+    return df.to_csv(index=False, header=False)
+
+
+class ChunkWriter:
+    """CSV は追記、Parquet は ParquetWriter で逐次書き出す"""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet = None
+        self._csv = None
+
+    def write(self, df):
+        self.write_encoded(encode_chunk(df, self.path), list(df.columns))
+
+    def write_encoded(self, data, columns):
+        if _is_parquet(self.path):
+            if self._parquet is None:
+                self._parquet = _require_pyarrow().parquet.ParquetWriter(self.path, data.schema)
+            self._parquet.write_table(data)
+        else:
+            if self._csv is None:
+                self._csv = open(self.path, "w", encoding="utf-8", newline="")
+                self._csv.write(pd.DataFrame(columns=columns).to_csv(index=False))
+            self._csv.write(data)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._csv is not None:
+            self._csv.close()
+
+
+def iter_chunks(paths, chunksize=DEFAULT_CHUNKSIZE):
+    for path in [paths] if isinstance(paths, str) else paths:
+        yield from read_chunks(path, chunksize)
+
+
+def score_file(engine, src, dst, chunksize=DEFAULT_CHUNKSIZE, progress=None, editions=None):
+    """入力ファイル (複数可) をチャンクごとに採点して dst に書き出す。採点した行数を返す"""
+    writer = ChunkWriter(dst)
+    total = 0
+    try:
+        for chunk in iter_chunks(src, chunksize):
+            writer.write(score_frame(engine, chunk, editions))
+            total += len(chunk)
+            if progress: progress(total)
+    finally:
+        writer.close()
+    return total
+
+
+# --- 並列採点 (プロセスプール) ---
+_worker_engine = None
+
+
+def _init_worker(data_dir):
+    global _worker_engine
+    _worker_engine = ScoringEngine(data_dir)
+
+
+def _score_chunk(chunk, editions, dst):
+    scored = score_frame(_worker_engine, chunk, editions)
+    return encode_chunk(scored, dst), list(scored.columns), len(scored)
+
+
+def _warm_cache(data_dir, editions=None):
+    """ワーカーが CSV を解析しなくて済むように、使う版の .npy キャッシュを先に作っておく"""
+    for g in GENDERS:
+        paths = [find_table_file(g, data_dir)]
+        paths += [p for name, p in find_editions(g, data_dir).items() if name in (editions or [])]
+        for path in paths:
+            if path is not None:
+                load_table(path)
+
+
+def score_files_parallel(srcs, dst, workers=None, chunksize=DEFAULT_CHUNKSIZE, data_dir=".",
+                         progress=None, editions=None):
+    """複数の入力ファイルをチャンク単位でプロセスプールに振り分けて採点し、dst に書き出す。
+
+    処理中のチャンクは workers × 2 個までに抑え、終わったものから入力順に書き出す。
+    採点と出力形式への変換はワーカーで行い、親プロセスは読み込みと書き込みだけを行う。
+    採点した行数を返す。
+    """
+    workers = workers or os.cpu_count() or 1
+    _warm_cache(data_dir, editions)
+    writer = ChunkWriter(dst)
+    pending = deque()
+    total = 0
+
+    def write_next():
+        nonlocal total
+        data, columns, n = pending.popleft().result()
+        writer.write_encoded(data, columns)
+        total += n
+        if progress: progress(total)
+
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(data_dir,)) as pool:
+            for chunk in iter_chunks(srcs, chunksize):
+                pending.append(pool.submit(_score_chunk, chunk, editions, dst))
+                while len(pending) >= workers * 2 or (pending and pending[0].done()):
+                    write_next()
+            while pending:
+                write_next()
+    finally:
+        writer.close()
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a results file (athlete, gender, event, mark) with the World Athletics tables.")
+    parser.add_argument("input", nargs="+", help="results CSV or Parquet (several files are scored into one output)")
+    parser.add_argument("-o", "--output", required=True, help="output CSV or Parquet")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--data-dir", default=".", help="directory with M_ALL_*.csv / W_ALL_*.csv")
+    parser.add_argument("--editions", nargs="*", help="also add points_<edition> columns for these table editions")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0 = all cores, 1 = no pool)")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+
+    def progress(n):
+        elapsed = time.perf_counter() - t0
+        print(f"\r{n:,} rows ({n / max(elapsed, 1e-9):,.0f} rows/s)", end="", file=sys.stderr)
+
+    if args.workers == 1:
+        total = score_file(ScoringEngine(args.data_dir), args.input, args.output, args.chunksize, progress, args.editions)
+    else:
+        total = score_files_parallel(args.input, args.output, args.workers or None, args.chunksize,
+                                     args.data_dir, progress, args.editions)
+    elapsed = time.perf_counter() - t0
+    print(f"\rscored {total:,} rows in {elapsed:.2f}s -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
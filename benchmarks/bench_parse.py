@@ -0,0 +1,89 @@
+"""採点表の一括解析 (parse_records_frame) の検証とベンチマーク
+
+    python -m benchmarks.bench_parse [CSV ...]
+
+1 セルずつの parse_record_from_csv と全セルを突き合わせ、
+違いが Excel 時刻化セルの補正分だけであることを確認してから処理時間を比較する。
+入力された記録用の parse_record_array は、桁区切りのカンマや長すぎる入力などの例で確かめる。
+"""
+import glob
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from events import get_event_type
+from records import parse_record_array, parse_record_from_csv, parse_records_frame
+
+# 入力された記録 → 期待する値 (NaN は解析できない)
+INPUT_CASES = [
+    ("10.52", 10.52),
+    ("1,234", 1234.0),
+    ("10,52", np.nan),
+    ("1:02.5", 62.5),
+    ("2:03:45", 7425.0),
+    ("-", np.nan),
+    # 長すぎる入力は例外にせず NaN (小数部 30 桁・200 桁の数字・256 個のコロン)
+    ("0." + "1" * 30, np.nan),
+    ("1" * 200, np.nan),
+    ("1." + "5" * 300, np.nan),
+    (":" * 256 + "1", np.nan),
+]
+
+
+def check_against_scalar(df, columns):
+    fast = parse_records_frame(df, columns)
+    slow = df[columns].apply(lambda col: col.map(parse_record_from_csv)).to_numpy(dtype=np.float64)
+
+    same = (fast == slow) | (np.isnan(fast) & np.isnan(slow))
+    # 補正されたセル: 時刻化された "mm:ss" は 1/60、フィールドの日付割合は 1/86400
+    is_field = np.array([get_event_type(c) == "field" for c in columns])
+    scale = np.where(is_field, 86400.0, 60.0)
+    corrected = ~same & np.isclose(fast * scale, slow, rtol=0, atol=1e-6)
+    mismatched = ~same & ~corrected
+    for r, c in zip(*np.nonzero(mismatched)):
+        print(f"  MISMATCH {columns[c]!r} row {r}: {df[columns[c]].iloc[r]!r} -> {fast[r, c]} (scalar {slow[r, c]})")
+    return int(corrected.sum()), int(mismatched.sum())
+
+
+def check_input_marks():
+    marks = np.array([c for c, _ in INPUT_CASES], dtype=object)
+    got = parse_record_array(marks)
+    mismatched = 0
+    for (cell, want), value in zip(INPUT_CASES, got):
+        if not (value == want or (np.isnan(value) and np.isnan(want))):
+            mismatched += 1
+            print(f"  MISMATCH input {cell[:40]!r} -> {value} (expected {want})")
+    print(f"parse_record_array: {len(INPUT_CASES)} input cases, mismatches {mismatched}")
+    return mismatched
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), float(np.median(times))
+
+
+def main(paths, repeat=5):
+    failed = check_input_marks() > 0
+    for path in paths:
+        df = pd.read_csv(path, dtype=str)
+        columns = [c for c in df.columns if c.lower() not in ["points", "pts", "score"]]
+        corrected, mismatched = check_against_scalar(df, columns)
+        failed |= mismatched > 0
+        print(f"{path}: {df.shape[0]} rows x {len(columns)} events, corrected cells {corrected}, mismatches {mismatched}")
+
+        scalar = best_of(lambda: df[columns].apply(lambda col: col.map(parse_record_from_csv)), repeat)
+        vector = best_of(lambda: parse_records_frame(df, columns), repeat)
+        print(f"  scalar parse_record_from_csv : best {scalar[0] * 1e3:7.1f} ms, median {scalar[1] * 1e3:7.1f} ms")
+        print(f"  parse_records_frame          : best {vector[0] * 1e3:7.1f} ms, median {vector[1] * 1e3:7.1f} ms"
+              f"  ({scalar[0] / vector[0]:.1f}x)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:] or sorted(glob.glob("*_ALL_*.csv"))))
@@ -0,0 +1,190 @@
+"""採点処理の主要経路のベンチマーク
+
+    python -m benchmarks.bench_scoring [--gender M W] [--samples 2000] [--repeat 5] [--skip-golden]
+
+同梱の M_ALL_*.csv / W_ALL_*.csv を使い、性別ごとに次を測る。
+  - 表の読み込み (旧 read_csv / CSV 解析 / キャッシュ作成 / キャッシュ読み込み / 検索構造の構築)
+  - 1 件あたりの検索時間の分布 (旧 clean_df 検索 / engine.score / 同得点比較)
+  - 全種目・全セルをまとめて採点したときの処理量
+  - 読み込みと検索構造の構築で確保したメモリのピーク (tracemalloc + pyarrow のメモリプール)
+計測の前に benchmarks.golden で旧検索ロジックとの一致を確かめる (不一致なら終了コード 1)。
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.bench_parse import best_of
+from benchmarks.golden import check_gender, legacy_frame
+from engine import GENDERS, ScoringEngine
+from events import OLYMPIC_EVENTS_FOR_COMPARE, get_event_type, is_higher_better
+from points_index import PointsIndex
+from records import parse_record_from_csv
+from scoring_index import build_scoring_index
+from table_cache import find_table_file, load_table, parse_table_csv
+
+
+def percentiles(times):
+    t = np.asarray(times) * 1e6
+    return "p50 {:8.1f} us  p90 {:8.1f} us  p99 {:8.1f} us".format(*np.percentile(t, [50, 90, 99]))
+
+
+def timed_each(fn, args):
+    times = []
+    for a in args:
+        t0 = time.perf_counter()
+        fn(*a)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def _arrow_bytes():
+    try:
+        import pyarrow
+    except ImportError:
+        return 0
+    return pyarrow.total_allocated_bytes()
+
+
+def peak_memory(fn):
+    """fn の実行中に確保したメモリのピーク (バイト)。
+
+    tracemalloc は pandas 3 の Arrow 文字列のバッファ (pyarrow のメモリプール) を数えないので、
+    fn の戻り値が持っている Arrow のバッファの分を足す。
+    """
+    arrow_before = _arrow_bytes()
+    tracemalloc.start()
+    try:
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1] + max(_arrow_bytes() - arrow_before, 0)
+        del result
+        return peak
+    finally:
+        tracemalloc.stop()
+
+
+def sample_queries(table, n, rng):
+    """(種目, 記録) を n 件。表の記録そのものと、その間の値を半々に混ぜる"""
+    cols = [j for j in range(len(table.columns)) if not np.isnan(table.values[j]).all()]
+    out = []
+    for j in rng.choice(cols, n):
+        v = table.values[j][~np.isnan(table.values[j])]
+        val = float(rng.choice(v)) + (0.005 if rng.random() < 0.5 else 0.0)
+        out.append((table.columns[j], val))
+    return out
+
+
+# --- 旧 app.py の処理 (比較用) ---
+def legacy_search(df, event, value):
+    clean_df = df[df[event].str.strip() != "-"].copy()
+    clean_df['val'] = clean_df[event].apply(parse_record_from_csv)
+    clean_df = clean_df.dropna(subset=['val']).sort_values("Points_Num", ascending=False).reset_index(drop=True)
+    if is_higher_better(get_event_type(event)):
+        candidates = clean_df[clean_df['val'] <= value]
+    else:
+        candidates = clean_df[clean_df['val'] >= value]
+    best_match_idx = candidates.index[0] if not candidates.empty else clean_df.index[-1]
+    return int(clean_df.iloc[best_match_idx]["Points_Num"])
+
+
+def legacy_equivalents(df, score):
+    rows = df[df["Points_Num"] == score]
+    if rows.empty:
+        return {}
+    rd = rows.iloc[0]
+    return {e: rd[e] for e in OLYMPIC_EVENTS_FOR_COMPARE if e in rd and str(rd[e]).strip() != "-"}
+
+
+def bench_gender(engine, gender, samples, repeat, rng):
+    path = find_table_file(gender, engine.data_dir)
+    table = engine.table(gender)
+    print(f"== {gender}: {path} ({len(table.points)} rows x {len(table.columns)} events) ==")
+
+    # 1. 読み込み
+    print("  cold load")
+    rows = []
+    rows.append(("legacy read_csv + Points_Num", best_of(lambda: legacy_frame(path), repeat)))
+    rows.append(("parse_table_csv", best_of(lambda: parse_table_csv(path), repeat)))
+
+    def cold_cache():
+        with tempfile.TemporaryDirectory() as d:
+            load_table(path, d)
+    rows.append(("load_table (cache miss)", best_of(cold_cache, repeat)))
+    with tempfile.TemporaryDirectory() as d:
+        load_table(path, d)
+        rows.append(("load_table (cache hit)", best_of(lambda: load_table(path, d), repeat)))
+    rows.append(("build_scoring_index", best_of(lambda: build_scoring_index(table), repeat)))
+    rows.append(("PointsIndex", best_of(lambda: PointsIndex(table), repeat)))
+    for name, (best, median) in rows:
+        print(f"    {name:<30} best {best * 1e3:8.2f} ms  median {median * 1e3:8.2f} ms")
+
+    # 2. 1 件あたりの検索時間
+    print("  per-lookup latency")
+    queries = sample_queries(table, samples, rng)
+    df = legacy_frame(path)
+    n_legacy = max(1, samples // 10)   # 旧ロジックは遅いので件数を減らす
+    print(f"    {'legacy clean_df search':<30} {percentiles(timed_each(lambda e, v: legacy_search(df, e, v), queries[:n_legacy]))}"
+          f"  (n={n_legacy})")
+    print(f"    {'engine.score':<30} {percentiles(timed_each(lambda e, v: engine.score(gender, e, v), queries))}")
+    scores = [(int(p),) for p in rng.choice(table.points, samples)]
+    print(f"    {'legacy equivalents row scan':<30} {percentiles(timed_each(lambda p: legacy_equivalents(df, p), scores[:n_legacy]))}"
+          f"  (n={n_legacy})")
+    print(f"    {'engine.equivalents':<30} "
+          f"{percentiles(timed_each(lambda p: engine.equivalents(gender, p, OLYMPIC_EVENTS_FOR_COMPARE), scores))}")
+
+    # 3. 全種目・全セルの一括採点
+    cells = [(e, table.values[j][~np.isnan(table.values[j])]) for j, e in enumerate(table.columns)]
+    cells = [(e, v) for e, v in cells if len(v)]
+    n_cells = sum(len(v) for _, v in cells)
+    best, _ = best_of(lambda: [engine.score_many(gender, e, v) for e, v in cells], repeat)
+    print(f"  batch throughput: {n_cells} cells in {best * 1e3:.2f} ms ({n_cells / best / 1e6:.2f} M lookups/s)")
+
+    # 4. メモリのピーク
+    print("  peak memory")
+
+    def legacy_load():
+        df = legacy_frame(path)
+        legacy_search(df, queries[0][0], queries[0][1])
+        return df
+
+    def full_build():
+        t = parse_table_csv(path)
+        return t, build_scoring_index(t), PointsIndex(t)
+
+    print(f"    {'legacy read_csv + 1 search':<30} {peak_memory(legacy_load) / 2**20:8.2f} MiB")
+    print(f"    {'parse + index + PointsIndex':<30} {peak_memory(full_build) / 2**20:8.2f} MiB")
+    with tempfile.TemporaryDirectory() as d:
+        load_table(path, d)
+        print(f"    {'load_table (cache hit) + index':<30} "
+              f"{peak_memory(lambda: build_scoring_index(load_table(path, d))) / 2**20:8.2f} MiB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark table loading, lookups and batch scoring.")
+    parser.add_argument("--gender", nargs="*", choices=GENDERS, default=list(GENDERS))
+    parser.add_argument("--data-dir", default=".")
+    parser.add_argument("--samples", type=int, default=2000, help="lookups per latency measurement")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-golden", action="store_true", help="skip the regression check")
+    args = parser.parse_args(argv)
+
+    engine = ScoringEngine(args.data_dir)
+    rng = np.random.default_rng(args.seed)
+    genders = [g for g in args.gender if engine.has_table(g)]
+    failed = False
+    if not args.skip_golden:
+        for g in genders:
+            checked, mismatched = check_gender(engine, g)
+            failed |= mismatched > 0
+            print(f"golden {g}: {checked} lookups checked, {mismatched} mismatches")
+    for g in genders:
+        bench_gender(engine, g, args.samples, args.repeat, rng)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""検索結果の回帰チェック (旧 app.py の検索ロジックとの突き合わせ)
+
+    python -m benchmarks.golden [--gender M W] [--data-dir .]
+
+採点表の全セルの記録 (とその前後・表の範囲外の値) を入力として、
+ScoringEngine.score と旧 app.py の clean_df 検索 (条件を満たす最初の行) の
+得点・採点表の記録が一致することを確かめる。
+
+旧ロジックは種目ごとに clean_df を作り直して 1 件ずつ全行を調べていたが、
+ここでは同じ clean_df に対して全入力をまとめて総当たりで調べる (結果は同じ)。
+記録の数値はエンジンと同じ解析結果を使い、検索ロジックだけを比べる。
+旧ロジックの検索の向き (記録が大きいほど高得点か) は、エンジンと同じ get_event_type ではなく
+各列の得点と記録の傾向から決める。種目の判定を誤るとエンジン側だけ向きが変わり、不一致として現れる。
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from engine import GENDERS, ScoringEngine
+
+HALF_STEP = 0.005   # 表の記録の最小単位 (0.01) の半分
+
+
+def legacy_frame(path):
+    """旧 load_data と同じ読み込み (文字列のまま + Points_Num)"""
+    df = pd.read_csv(path, dtype=str)
+    p_col = [c for c in df.columns if c.lower() in ["points", "pts", "score"]][0]
+    df["Points_Num"] = pd.to_numeric(df[p_col].str.replace(',', ''), errors='coerce').fillna(0).astype(int)
+    return df
+
+
+def legacy_clean_df(df, event, values):
+    """旧 app.py の clean_df (values は解析済みの記録列)"""
+    clean_df = df[[event, "Points_Num"]].assign(val=values)
+    clean_df = clean_df[clean_df[event].str.strip() != "-"]
+    return clean_df.dropna(subset=['val']).sort_values("Points_Num", ascending=False).reset_index(drop=True)
+
+
+def higher_is_better(points, values):
+    """列の得点と記録の相関の向きから「記録が大きいほど高得点か」を決める (種目名に依存しない)"""
+    ok = ~np.isnan(values)
+    if ok.sum() < 2:
+        return False
+    return bool(np.corrcoef(np.asarray(points, dtype=np.float64)[ok], values[ok])[0, 1] > 0)
+
+
+def legacy_match(clean_df, queries, higher_is_better, chunk=2048):
+    """各入力について「条件を満たす最初の行 (無ければ最後の行)」の位置を総当たりで求める"""
+    val = clean_df["val"].to_numpy()
+    out = np.empty(len(queries), dtype=np.int64)
+    for s in range(0, len(queries), chunk):
+        q = queries[s:s + chunk, None]
+        hit = (val <= q) if higher_is_better else (val >= q)
+        out[s:s + chunk] = np.where(hit.any(axis=1), hit.argmax(axis=1), len(val) - 1)
+    return out
+
+
+def queries_for(values):
+    """表の全記録と、その前後 (最小単位の半分) と範囲外の値 (0 以下は score と同じく無効なので除く)"""
+    v = values[~np.isnan(values)]
+    if len(v) == 0:
+        return v
+    q = np.unique(np.concatenate([v, v - HALF_STEP, v + HALF_STEP, [v.min() - 1.0, v.max() + 1.0]]))
+    return q[q > 0]
+
+
+def check_gender(engine, gender, verbose=True):
+    table = engine.table(gender)
+    df = legacy_frame(table.source)
+    checked = mismatched = 0
+    for j, event in enumerate(table.columns):
+        values = np.asarray(table.values[j], dtype=np.float64)
+        clean_df = legacy_clean_df(df, event, values)
+        if clean_df.empty:
+            continue
+        queries = queries_for(values)
+        pos = legacy_match(clean_df, queries, higher_is_better(table.points, values))
+        want_pts = clean_df["Points_Num"].to_numpy()[pos]
+        want_rec = clean_df[event].to_numpy()[pos]
+
+        got_pts, got_rec = engine.score_many(gender, event, queries)
+        bad = (got_pts != want_pts) | (got_rec.astype(str) != want_rec.astype(str))
+        checked += len(queries)
+        mismatched += int(bad.sum())
+        if verbose:
+            for i in np.flatnonzero(bad)[:5]:
+                print(f"  MISMATCH {gender} {event!r} {queries[i]!r}: {got_pts[i]} {got_rec[i]!r}"
+                      f" (legacy {want_pts[i]} {want_rec[i]!r})")
+    return checked, mismatched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check engine lookups against the legacy clean_df search for every table cell.")
+    parser.add_argument("--gender", nargs="*", choices=GENDERS, default=list(GENDERS))
+    parser.add_argument("--data-dir", default=".")
+    args = parser.parse_args(argv)
+
+    engine = ScoringEngine(args.data_dir)
+    failed = False
+    for g in args.gender:
+        if not engine.has_table(g):
+            print(f"{g}: no table")
+            continue
+        checked, mismatched = check_gender(engine, g)
+        failed |= mismatched > 0
+        print(f"{g}: {checked} lookups checked, {mismatched} mismatches")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""種目名の解決の回帰チェック
+
+    python -m benchmarks.resolver_cases [--data-dir .]
+
+表記ゆれの入力ごとに、対応づけられるべき採点表の列 (None は対応なし) と実際の解決結果を比べる。
+ハードル・障害・競歩の名前が (印が前にあっても) 平地・ロードの列にあいまい検索で対応づかないこと、
+屋内の指定があっても " sh" の列が無い種目は屋外の列に対応づくことを確かめる。
+"""
+import argparse
+import sys
+
+from engine import ScoringEngine
+
+# (性別, 入力の種目名, 期待する列名)
+CASES = [
+    # ハードル・障害の印は平地の列と入れ替わらない
+    ("M", "100m hurdles", None),
+    ("M", "100mH", None),
+    ("M", "200m hurdles", None),
+    ("M", "110m hurdles", "110mH"),
+    ("M", "110mハードル", "110mH"),
+    ("W", "100m hurdles", "100mH"),
+    ("W", "110m hurdles", None),
+    ("M", "3000m steeplechase", "3000m SC"),
+    ("W", "3000m障害", "3000m SC"),
+    ("W", "hurdles 100m", "100mH"),
+    ("M", "hurdles 100m", None),
+    ("M", "Steeplechase 3000m", "3000m SC"),
+    ("M", "walk 20km", "20km W"),
+    ("W", "walk 20km", "20km W"),
+    ("M", "walk 3000m", "3000mW"),
+    ("M", "競歩20km", "20km W"),
+    # " sh" の列が無い種目は屋内の指定があっても屋外の列へ
+    ("M", "60m indoor", "60m"),
+    ("M", "high jump indoor", "HJ"),
+    ("W", "shot put indoor", "SP"),
+    ("M", "3000m indoor", "3000m sh"),
+    # 屋外の列が無い種目は指定が無くても " sh" の列へ
+    ("W", "Pentathlon", "Pent. sh"),
+    # 綴りの誤り・対応しない種目
+    ("M", "javlin", "JT"),
+    ("M", "20km race walk", "20km W"),
+    ("M", "10 kilometres", "10 km"),
+    ("W", "20 kilometers race walk", "20km W"),
+    ("M", "mile walk", None),
+    ("M", "standing long jump", None),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check free-form event names against their expected columns.")
+    parser.add_argument("--data-dir", default=".")
+    args = parser.parse_args(argv)
+
+    engine = ScoringEngine(args.data_dir)
+    failed = 0
+    for gender, name, expected in CASES:
+        if not engine.has_table(gender):
+            continue
+        r = engine.resolver(gender).resolve(name)
+        column = r.column if r else None
+        if column != expected:
+            failed += 1
+            print(f"{gender} {name!r}: expected {expected!r}, got {column!r}")
+    print(f"{len(CASES)} cases, {failed} failures")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+import metrics
+from events import (
+    CATEGORIES_EN, CATEGORIES_JP, CUSTOM_SORT_ORDER,
+    classify_event, classify_event_en, get_display_name, get_event_type
+)
+
+# ==========================================
+# ★ 種目カタログ (表示名・カテゴリ・並び順)
+# ==========================================
+# 種目一覧の分類と並び替えは (性別, 言語, データ版) が同じなら結果も同じなので、
+# 一度だけ作って使い回す。保持する数には上限を設け、古いものから捨てる。
+CATALOGUE_CACHE_SIZE = 16
+_SORT_RANK = {name: i for i, name in enumerate(CUSTOM_SORT_ORDER)}
+
+
+class EventEntry:
+    __slots__ = ("raw", "display", "category", "mode", "rank")
+
+    def __init__(self, raw, display, category, mode, rank):
+        self.raw = raw
+        self.display = display
+        self.category = category
+        self.mode = mode
+        self.rank = rank      # 主要種目の並び順 (主要種目以外は None)
+
+
+class EventCatalogue:
+    """1 つの採点表・言語に対する種目一覧。UI はここから読むだけ"""
+
+    def __init__(self, raw_events, lang_code):
+        self.lang_code = lang_code
+        if lang_code == "日本語":
+            self.categories = CATEGORIES_JP
+            default_cat = "短距離・ハードル・リレー"
+        else:
+            self.categories = CATEGORIES_EN
+            default_cat = "Sprints, Hurdles & Relays"
+
+        self.entries = {}          # 元の列名 → EventEntry
+        self.by_display = {}       # 表示名 → 元の列名
+        events_in = {cat: [] for cat in self.categories}
+        for raw in raw_events:
+            disp = get_display_name(raw, lang_code)
+            cat = classify_event(disp) if lang_code == "日本語" else classify_event_en(raw)
+            if cat not in events_in: cat = default_cat
+            entry = EventEntry(raw, disp, cat, get_event_type(raw), _SORT_RANK.get(raw.replace(" sh", "")))
+            self.entries[raw] = entry
+            self.by_display[disp] = raw
+            events_in[cat].append(disp)
+
+        # カテゴリ内ソート: 主要種目を指定順で先頭に、残りは名前順
+        self.events_in = {}
+        for cat, names in events_in.items():
+            names.sort()
+            ranks = [self.entries[self.by_display[d]].rank for d in names]
+            priority = sorted((r, d) for r, d in zip(ranks, names) if r is not None)
+            others = [d for r, d in zip(ranks, names) if r is None]
+            self.events_in[cat] = [d for _, d in priority] + others
+
+    def raw_name(self, display):
+        return self.by_display[display]
+
+    def entry(self, raw):
+        return self.entries[raw]
+
+
+_catalogues = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_catalogue(table, lang_code, gender=None):
+    """(性別, 言語, データ版) ごとのカタログを返す。無ければ作って LRU キャッシュに入れる"""
+    key = (gender, lang_code, table.version or table.source)
+    with _lock:
+        cat = _catalogues.get(key)
+        if cat is not None:
+            _catalogues.move_to_end(key)
+            metrics.count("catalogue.hit")
+            return cat
+    metrics.count("catalogue.miss")
+    with metrics.span("catalogue.build"):
+        cat = EventCatalogue(table.columns, lang_code)
+    with _lock:
+        _catalogues[key] = cat
+        _catalogues.move_to_end(key)
+        while len(_catalogues) > CATALOGUE_CACHE_SIZE:
+            _catalogues.popitem(last=False)
+    return cat
@@ -0,0 +1,191 @@
+"""混成競技の計算 (種目別得点・合計・目標達成に必要な記録)
+
+    python combined.py M Dec. 10.55 7.80 16.00 2.05 48.42 13.75 50.54 5.45 71.90 4:36.11
+    python combined.py W Hept. 12.69 1.86 15.80 22.56 - - - --target 7000
+
+*_ALL_*.csv には混成競技の合計得点の列しか無いため、種目別の得点は
+世界陸連の混成競技採点表の係数 (トラック: A·(B − T)^C, フィールド: A·(M − B)^C) で計算する。
+1 人分でも出場者全員分でも、全種目を 1 回の配列演算で採点する (未実施の種目は NaN)。
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from records import parse_record_array
+
+# ==========================================
+# ★ 混成競技の係数
+# ==========================================
+# (種目, A, B, C, 種別)  種別: track = 秒, jump = cm, throw = m
+_M = {
+    "100m": (25.4347, 18.0, 1.81, "track"),
+    "LJ": (0.14354, 220.0, 1.40, "jump"),
+    "SP": (51.39, 1.5, 1.05, "throw"),
+    "HJ": (0.8465, 75.0, 1.42, "jump"),
+    "400m": (1.53775, 82.0, 1.81, "track"),
+    "110mH": (5.74352, 28.5, 1.92, "track"),
+    "DT": (12.91, 4.0, 1.10, "throw"),
+    "PV": (0.2797, 100.0, 1.35, "jump"),
+    "JT": (10.14, 7.0, 1.08, "throw"),
+    "1500m": (0.03768, 480.0, 1.85, "track"),
+    "60m": (58.015, 11.5, 1.81, "track"),
+    "60mH": (20.5173, 15.5, 1.92, "track"),
+    "1000m": (0.08713, 305.5, 1.85, "track"),
+}
+_W = {
+    "200m": (4.99087, 42.5, 1.81, "track"),
+    "800m": (0.11193, 254.0, 1.88, "track"),
+    "100mH": (9.23076, 26.7, 1.835, "track"),
+    "HJ": (1.84523, 75.0, 1.348, "jump"),
+    "LJ": (0.188807, 210.0, 1.41, "jump"),
+    "SP": (56.0211, 1.5, 1.05, "throw"),
+    "JT": (15.9803, 3.8, 1.04, "throw"),
+    "60mH": (20.0479, 17.0, 1.835, "track"),
+}
+# 1 種目で現実に取りうる得点の上限 (種目別の世界記録でも 1200〜1400 点)。これを超える目標は届かない扱い
+MAX_EVENT_POINTS = 1500
+# (性別, 採点表の合計列) → 実施順の種目
+PROGRAMS = {
+    ("M", "Dec."): ["100m", "LJ", "SP", "HJ", "400m", "110mH", "DT", "PV", "JT", "1500m"],
+    ("M", "Hept. sh"): ["60m", "LJ", "SP", "HJ", "60mH", "PV", "1000m"],
+    ("W", "Hept."): ["100mH", "HJ", "SP", "200m", "LJ", "JT", "800m"],
+    ("W", "Pent. sh"): ["60mH", "HJ", "SP", "LJ", "800m"],
+}
+
+
+def format_mark(value, kind):
+    """秒 / メートルを記録の表記に戻す (例: 276.11 → "4:36.11")"""
+    if value is None or not np.isfinite(value):
+        return "-"
+    if kind != "track":
+        return f"{value:.2f}"
+    m, s = divmod(round(float(value), 2), 60)
+    return f"{int(m)}:{s:05.2f}" if m else f"{s:.2f}"
+
+
+class CombinedProgram:
+    """1 つの混成競技。marks は (..., 種目数) の配列 (秒 / メートル、未実施は NaN)"""
+
+    def __init__(self, gender, event, disciplines):
+        coef = _M if gender == "M" else _W
+        self.gender = gender
+        self.event = event
+        self.disciplines = list(disciplines)
+        self.kinds = [coef[d][3] for d in self.disciplines]
+        self.a, self.b, self.c = (np.array([coef[d][i] for d in self.disciplines]) for i in range(3))
+        self.track = np.array([k == "track" for k in self.kinds])
+        self.scale = np.where(np.array([k == "jump" for k in self.kinds]), 100.0, 1.0)
+        # 記録の最小単位 (トラック 0.01 秒、フィールド 1cm)
+        self.step = 0.01
+
+    def __len__(self):
+        return len(self.disciplines)
+
+    def parse(self, marks):
+        """記録の文字列 ("4:36.11", "7.80", "-", "") の並びを数値配列にする"""
+        arr = np.asarray(marks, dtype=object)
+        vals = parse_record_array(np.where(pd.isna(arr) | (arr == ""), "-", arr).astype(str).ravel())
+        return vals.reshape(arr.shape)
+
+    def _units(self, marks):
+        x = np.asarray(marks, dtype=np.float64) * self.scale
+        return np.where(self.track, self.b - x, x - self.b)
+
+    def score(self, marks):
+        """種目別の得点 (int)。未実施・得点圏外の種目は 0"""
+        d = self._units(marks)
+        ok = d > 0
+        with np.errstate(invalid="ignore"):
+            pts = np.floor(self.a * np.where(ok, d, 0.0) ** self.c + 1e-9)
+        return np.where(ok, pts, 0).astype(np.int64)
+
+    def performance_for(self, points):
+        """種目別の得点 → その得点に届く最も低い記録 (トラックは最も遅い記録)。
+
+        0 点以下と、届かない得点 (トラックで記録が 0 秒以下になる、MAX_EVENT_POINTS を超える) は NaN。
+        """
+        p = np.asarray(points, dtype=np.float64)
+        p = np.broadcast_to(p, np.broadcast_shapes(p.shape, self.a.shape))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            d = (p / self.a) ** (1.0 / self.c)
+        x = np.where(self.track, self.b - d, self.b + d) / self.scale
+        # 記録の単位に丸める (トラックは切り捨て、フィールドは切り上げ)。丸め誤差で届かなければ 1 単位動かす
+        x = np.where(self.track, np.floor(x / self.step + 1e-9), np.ceil(x / self.step - 1e-9)) * self.step
+        short = self.score(x) < p
+        x = np.where(short, x + np.where(self.track, -self.step, self.step), x)
+        reachable = (p > 0) & (p <= MAX_EVENT_POINTS) & ~(self.track & (d >= self.b))
+        return np.where(reachable, x, np.nan)
+
+    def needed(self, marks, target, baseline=None):
+        """目標合計 target に必要な残り種目の得点と記録を返す ((得点, 記録), 実施済みの種目は NaN)
+
+        届かない得点の種目は記録が NaN になる (format_mark では "-")。
+
+        不足分は残り種目に baseline (自己ベストなどの記録) の得点比で割り振る。
+        baseline を省略すると均等に割り振る。marks は 1 人分 (種目数,) でも複数人 (人数, 種目数) でもよい。
+        """
+        marks = np.asarray(marks, dtype=np.float64)
+        left = np.isnan(marks)
+        deficit = np.asarray(target, dtype=np.float64) - self.score(marks).sum(axis=-1)
+        weight = np.ones(marks.shape) if baseline is None else np.maximum(self.score(baseline), 1).astype(np.float64)
+        weight = np.where(left, weight, 0.0)
+        total = weight.sum(axis=-1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = weight / total
+        pts = np.where(left, np.ceil(np.maximum(deficit, 0)[..., None] * share), np.nan)
+        return pts, np.where(left, self.performance_for(np.nan_to_num(pts)), np.nan)
+
+    def progression(self, marks, targets):
+        """目標合計ごとに残り種目で必要な記録を並べた表 (均等割り)"""
+        marks = np.asarray(marks, dtype=np.float64)
+        targets = np.asarray(targets)
+        left = np.flatnonzero(np.isnan(marks))
+        _, need = self.needed(np.broadcast_to(marks, (len(targets), len(self))), targets)
+        data = [[format_mark(v, self.kinds[j]) for j, v in zip(left, row[left])] for row in need]
+        return pd.DataFrame(data, index=pd.Index(targets, name="Total"),
+                            columns=[self.disciplines[j] for j in left])
+
+    def board(self, marks, athletes=None):
+        """出場者全員の種目別得点・合計・順位 (各種目の終了ごとに呼び直す想定)"""
+        marks = np.atleast_2d(np.asarray(marks, dtype=np.float64))
+        pts = self.score(marks)
+        df = pd.DataFrame(pts, index=athletes, columns=self.disciplines)
+        df["Total"] = pts.sum(axis=1)
+        df["Rank"] = df["Total"].rank(ascending=False, method="min").astype(int)
+        return df
+
+
+_programs = {key: CombinedProgram(*key, disciplines) for key, disciplines in PROGRAMS.items()}
+
+
+def get_program(gender, event):
+    """(性別, 採点表の列名) の混成競技。対象外なら None"""
+    return _programs.get((gender, event))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score the individual marks of a combined event.")
+    parser.add_argument("gender", choices=["M", "W"])
+    parser.add_argument("event", help="table column, e.g. Dec. / Hept. / Hept. sh / Pent. sh")
+    parser.add_argument("marks", nargs="*", help="marks in competition order, '-' for events not yet held")
+    parser.add_argument("--target", type=int, help="show marks needed in the remaining events to reach this total")
+    args = parser.parse_args(argv)
+
+    program = get_program(args.gender, args.event)
+    if program is None:
+        parser.error(f"not a combined event: {args.gender} {args.event}")
+    marks = program.parse((args.marks + ["-"] * len(program))[:len(program)])
+    pts = program.score(marks)
+    for d, kind, m, p, run in zip(program.disciplines, program.kinds, marks, pts, np.cumsum(pts)):
+        print(f"  {d:<6} {format_mark(m, kind):>8} {p:5d} {run:6d}")
+    print(f"  Total {pts.sum():>21d}")
+    if args.target:
+        need_pts, need = program.needed(marks, args.target)
+        for j in np.flatnonzero(np.isnan(marks)):
+            note = "needed" if np.isfinite(need[j]) else "out of reach"
+            print(f"  {program.disciplines[j]:<6} {format_mark(need[j], program.kinds[j]):>8} {int(need_pts[j]):5d}  ({note})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""採点表の版 (edition) ごとの採点と、版どうしの得点差
+
+    python editions.py M                                   # 版の一覧
+    python editions.py M --old 20240101 --new 20260112 [--events 100m LJ] [-o delta_M.csv]
+    python editions.py M --old 20240101 --new 20260112 --detail 400m
+
+*_ALL_<版>.csv を版ごとに必要になった時点で読み込む (最新版だけでなく過去の版も)。
+版が変わっても中身が同じ種目列は検索インデックスを 1 つだけ作って共有する。
+"""
+import argparse
+import hashlib
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from scoring_index import ScoringIndex, build_event_index
+from table_cache import load_table
+
+# ==========================================
+# ★ 版の一覧
+# ==========================================
+EDITION_RE = re.compile(r"^([MW])_ALL_(.+)\.csv$")
+
+
+def find_editions(gender_prefix, data_dir="."):
+    """{版: パス} を古い順に返す (版はファイル名の日付部分)"""
+    found = {}
+    for name in sorted(os.listdir(data_dir)):
+        m = EDITION_RE.match(name)
+        if m and m.group(1) == gender_prefix:
+            found[m.group(2)] = os.path.join(data_dir, name)
+    return found
+
+
+def edition_name(path):
+    """ファイル名から版を取り出す (M_ALL_20260112.csv → "20260112")"""
+    m = EDITION_RE.match(os.path.basename(path))
+    return m.group(2) if m else None
+
+
+class Edition:
+    """1 つの版の採点表と検索インデックス"""
+
+    def __init__(self, gender, name, path, table, index):
+        self.gender = gender
+        self.name = name
+        self.path = path
+        self.table = table
+        self.index = index
+
+
+def _column_digest(points, values, records):
+    h = hashlib.sha1()
+    for arr in (points, values, records):
+        h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+# ==========================================
+# ★ 版のストア
+# ==========================================
+class EditionStore:
+
+    def __init__(self, data_dir="."):
+        self.data_dir = data_dir
+        self._editions = {}     # (性別, 版) → Edition
+        self._shared = {}       # (種目, 列の内容のハッシュ) → EventIndex (版をまたいで共有)
+        self._lock = threading.Lock()
+
+    def names(self, gender):
+        return list(find_editions(gender, self.data_dir))
+
+    def latest(self, gender):
+        names = self.names(gender)
+        return names[-1] if names else None
+
+    def get(self, gender, name):
+        key = (gender, name)
+        ed = self._editions.get(key)
+        if ed is not None:
+            return ed
+        path = find_editions(gender, self.data_dir).get(name)
+        if path is None:
+            raise ValueError(f"unknown edition: {gender} {name!r}")
+        with self._lock:
+            ed = self._editions.get(key)
+            if ed is None:
+                with metrics.span("editions.load"):
+                    table = load_table(path)
+                    ed = Edition(gender, name, path, table, self._build_index(table))
+                self._editions[key] = ed
+        return ed
+
+    def _build_index(self, table):
+        points = np.asarray(table.points, dtype=np.int32)
+        events = {}
+        for j, e in enumerate(table.columns):
+            key = (e, _column_digest(points, table.values[j], table.records[j]))
+            idx = self._shared.get(key)
+            if idx is None:
+                metrics.count("editions.column_miss")
+                idx = self._shared[key] = build_event_index(e, points, np.asarray(table.values[j]), table.event_records(e))
+            else:
+                metrics.count("editions.column_shared")
+            events[e] = idx
+        return ScoringIndex(events)
+
+    def memory_report(self):
+        """(読み込んだ列の数, 実際に持っているインデックスの数)"""
+        with self._lock:
+            total = sum(len(ed.index.events) for ed in self._editions.values())
+            return total, len(self._shared)
+
+    def _resolve(self, gender, editions):
+        return self.names(gender) if editions is None else list(editions)
+
+    # --- 採点 ---
+    def score(self, gender, event, performance, editions=None):
+        """1 つの記録を複数の版で採点し {版: (得点, 採点表の記録)} を返す (種目の無い版は None)
+
+        記録は ScoringEngine.score と同じく正の有限値だけを受け付ける (それ以外は ValueError)。
+        """
+        value = float(performance)
+        if not np.isfinite(value) or value <= 0:
+            raise ValueError(f"invalid performance: {performance!r}")
+        out = {}
+        for name in self._resolve(gender, editions):
+            ed = self.get(gender, name)
+            if event not in ed.index or ed.index[event].empty:
+                out[name] = None
+                continue
+            idx = ed.index[event]
+            pos = int(idx.lookup(value))
+            out[name] = (int(idx.points[pos]), str(idx.records[pos]))
+        return out
+
+    def score_many(self, gender, event, performances, editions=None):
+        """同じ種目の記録 (数値配列) を複数の版で採点し、版ごとの得点列の DataFrame を返す"""
+        vals = np.asarray(performances, dtype=np.float64)
+        ok = np.isfinite(vals) & (vals > 0)
+        cols = {}
+        for name in self._resolve(gender, editions):
+            ed = self.get(gender, name)
+            pts = np.full(len(vals), np.nan)
+            if event in ed.index and not ed.index[event].empty and ok.any():
+                idx = ed.index[event]
+                pts[ok] = idx.points[idx.lookup(vals[ok])]
+            cols[name] = pd.Series(pts).astype("Int64")
+        return pd.DataFrame(cols)
+
+    # --- 版どうしの比較 ---
+    def _delta_arrays(self, old_idx, new_idx):
+        """両方の版の表に載っている全記録について (記録, 旧得点, 新得点)"""
+        marks = np.union1d(old_idx.values, new_idx.values)
+        if old_idx is new_idx:
+            pts = old_idx.points[old_idx.lookup(marks)]
+            return marks, pts, pts
+        return marks, old_idx.points[old_idx.lookup(marks)], new_idx.points[new_idx.lookup(marks)]
+
+    def delta(self, gender, old, new, events=None):
+        """種目ごとの得点差の集計 (両方の版にある種目のみ)"""
+        a, b = self.get(gender, old), self.get(gender, new)
+        events = [e for e in (events or b.table.columns) if e in a.index and e in b.index]
+        rows = []
+        for e in events:
+            oi, ni = a.index[e], b.index[e]
+            if oi.empty or ni.empty:
+                continue
+            marks, op, np_ = self._delta_arrays(oi, ni)
+            d = np_.astype(np.int64) - op
+            rows.append((e, oi is ni, len(marks), int(np.count_nonzero(d)), float(d.mean()),
+                         int(d.min()), int(d.max()), int(np.abs(d).max())))
+        return pd.DataFrame(rows, columns=["event", "identical", "marks", "changed", "mean_delta",
+                                           "min_delta", "max_delta", "max_abs_delta"]).set_index("event")
+
+    def delta_detail(self, gender, old, new, event):
+        """1 種目の記録ごとの得点差 (記録, 旧得点, 新得点, 差)"""
+        marks, op, np_ = self._delta_arrays(self.get(gender, old).index[event], self.get(gender, new).index[event])
+        return pd.DataFrame({"mark": marks, old: op, new: np_, "delta": np_.astype(np.int64) - op})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List table editions and report point deltas between two of them.")
+    parser.add_argument("gender", choices=["M", "W"])
+    parser.add_argument("--old", help="older edition (e.g. 20240101)")
+    parser.add_argument("--new", help="newer edition (default: latest)")
+    parser.add_argument("--events", nargs="*")
+    parser.add_argument("--detail", metavar="EVENT", help="per-mark deltas for one event")
+    parser.add_argument("-o", "--output", help="write the report as CSV")
+    parser.add_argument("--data-dir", default=".")
+    args = parser.parse_args(argv)
+
+    store = EditionStore(args.data_dir)
+    names = store.names(args.gender)
+    if not args.old:
+        print("\n".join(names))
+        return
+    new = args.new or store.latest(args.gender)
+    if args.detail:
+        df = store.delta_detail(args.gender, args.old, new, args.detail)
+    else:
+        df = store.delta(args.gender, args.old, new, args.events)
+    if args.output:
+        df.to_csv(args.output, encoding="utf-8-sig")
+    else:
+        print(df.to_string())
+    total, unique = store.memory_report()
+    print(f"{total} columns loaded, {unique} indexes kept ({total - unique} shared)")
+
+
+if __name__ == "__main__":
+    main()
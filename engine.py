@@ -0,0 +1,156 @@
+import numpy as np
+
+import metrics
+from catalogue import get_catalogue
+from combined import get_program
+from editions import EditionStore
+from records import parse_record_from_csv
+from resolver import get_resolver
+from table_store import CHECK_INTERVAL, TableStore
+
+# ==========================================
+# ★ 採点エンジン (Streamlit 非依存)
+# ==========================================
+GENDERS = ("M", "W")
+
+
+def to_performance(performance):
+    """数値 (秒 / メートル) または "1:45.30" 形式の文字列を float に変換する"""
+    if isinstance(performance, str):
+        val = parse_record_from_csv(performance)
+    else:
+        val = performance
+    if val is None or not np.isfinite(val) or val <= 0:
+        raise ValueError(f"invalid performance: {performance!r}")
+    return float(val)
+
+
+class ScoringEngine:
+    """採点表の読み込みと検索をまとめたエンジン。
+
+    表は性別ごとに初回アクセス時に読み込み、新しい日付の CSV が置かれると自動で切り替わる。
+    """
+
+    def __init__(self, data_dir=".", check_interval=CHECK_INTERVAL):
+        self.data_dir = data_dir
+        self.store = TableStore(data_dir, check_interval)
+        # 過去の版も含めた全版 (比較・再採点用。版ごとに必要になった時点で読み込む)
+        self.editions = EditionStore(data_dir)
+
+    # --- 表の読み込み ---
+    def snapshot(self, gender):
+        """現在の版の採点表と検索構造一式 (table_store.TableSnapshot)"""
+        if gender not in GENDERS:
+            raise ValueError(f"unknown gender: {gender!r}")
+        return self.store.get(gender)
+
+    def has_table(self, gender):
+        try:
+            self.snapshot(gender)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def table(self, gender):
+        return self.snapshot(gender).table
+
+    def index(self, gender):
+        return self.snapshot(gender).index
+
+    def points_index(self, gender):
+        """得点 → 各種目記録の逆引きインデックス (points_index.PointsIndex)"""
+        return self.snapshot(gender).points_index
+
+    def formula(self, gender):
+        """係数式による採点 (formula.FormulaTable)。初回呼び出し時に表から当てはめる"""
+        return self.snapshot(gender).formula
+
+    def events(self, gender):
+        return self.table(gender).columns
+
+    def catalogue(self, gender, lang_code):
+        """表示名・カテゴリ・並び順をまとめた種目カタログ (catalogue.EventCatalogue)"""
+        return get_catalogue(self.table(gender), lang_code, gender)
+
+    def resolver(self, gender):
+        """入力の種目名 (英語・日本語・表記ゆれ) → 採点表の列名 (resolver.EventResolver)"""
+        return get_resolver(self.table(gender).columns)
+
+    def resolve_event(self, gender, name):
+        """種目名を採点表の列名に揃える (解決できなければ None)"""
+        r = self.resolver(gender).resolve(name)
+        return r.column if r else None
+
+    def combined(self, gender, event):
+        """混成競技の種目別採点 (combined.CombinedProgram)。混成競技でなければ ValueError"""
+        program = get_program(gender, event)
+        if program is None:
+            raise ValueError(f"not a combined event: {gender} {event!r}")
+        return program
+
+    def event_index(self, gender, event, snapshot=None):
+        idx = (snapshot or self.snapshot(gender)).index[event]
+        if idx.empty:
+            raise ValueError(f"no valid data for {event!r}")
+        return idx
+
+    # --- 検索 ---
+    def match(self, gender, event, performance, snapshot=None):
+        """(種目インデックス, 該当行の位置) を返す。前後スコア表の表示などに使う
+
+        snapshot (engine.snapshot の戻り値) を渡すと、現在の版ではなくその版の表で検索する。
+        """
+        with metrics.span("lookup"):
+            idx = self.event_index(gender, event, snapshot)
+            return idx, int(idx.lookup(to_performance(performance)))
+
+    def score(self, gender, event, performance):
+        """記録 → (得点, 該当する採点表の記録)"""
+        idx, pos = self.match(gender, event, performance)
+        return int(idx.points[pos]), str(idx.records[pos])
+
+    def score_many(self, gender, event, performances):
+        """同じ種目の記録 (数値配列) をまとめて検索し、(得点配列, 採点表の記録配列) を返す
+
+        score で ValueError になる記録 (0 以下・NaN・無限大) は得点 -1・記録 "" にする。
+        """
+        with metrics.span("lookup.batch"):
+            idx = self.event_index(gender, event)
+            vals = np.asarray(performances, dtype=np.float64)
+            ok = np.isfinite(vals) & (vals > 0)
+            if ok.all():
+                pos = idx.lookup(vals)
+                return idx.points[pos], idx.records[pos]
+            points = np.full(vals.shape, -1, dtype=idx.points.dtype)
+            records = np.full(vals.shape, "", dtype=idx.records.dtype)
+            pos = idx.lookup(vals[ok])
+            points[ok] = idx.points[pos]
+            records[ok] = idx.records[pos]
+            return points, records
+
+    def performance_for(self, gender, event, points):
+        """得点 → その得点以上になる最も遅い (短い) 記録。(該当行の得点, 記録) を返す"""
+        idx = self.event_index(gender, event)
+        pos = int(np.searchsorted(-idx.points, -int(points), side="right")) - 1
+        if pos < 0:
+            return None, None
+        return int(idx.points[pos]), str(idx.records[pos])
+
+    def equivalents(self, gender, points, events=None, lang_code=None, snapshot=None):
+        """同じ得点の行にある各種目の記録を {種目: 記録} で返す ("-" の種目は除く)
+
+        lang_code を指定すると表示用に整形済みの文字列を返す。snapshot は match と同じ。
+        """
+        with metrics.span("equivalents"):
+            return (snapshot or self.snapshot(gender)).points_index.equivalents(points, events, lang_code)
+
+    # --- 逆引き (得点 → 記録) ---
+    def required_marks(self, gender, points, events=None, lang_code=None):
+        """目標得点に届く最も低い記録を {種目: (実際の得点, 記録)} で返す"""
+        with metrics.span("required_marks"):
+            return self.points_index(gender).required(points, events, lang_code)
+
+    def progression(self, gender, targets, events=None, lang_code=None, numeric=False):
+        """目標得点の並び × 種目の必要記録表 (DataFrame)。targets は得点の配列や range"""
+        with metrics.span("progression"):
+            return self.points_index(gender).progression(targets, events, lang_code, numeric)
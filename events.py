@@ -0,0 +1,97 @@
+import re
+
+# ==========================================
+# ★ 種目処理ロジック & 辞書
+# ==========================================
+EVENT_TRANSLATION_JP = {
+    "50m": "50m", "60m": "60m", "100m": "100m", "200m": "200m", "400m": "400m",
+    "800m": "800m", "1500m": "1500m", "3000m": "3000m", "5000m": "5000m", "10000m": "10000m",
+    "110mH": "110mH", "100mH": "100mH", "400mH": "400mH", "3000m SC": "3000m障害",
+    "HJ": "走高跳", "PV": "棒高跳", "LJ": "走幅跳", "TJ": "三段跳",
+    "SP": "砲丸投", "DT": "円盤投", "HT": "ハンマー投", "JT": "やり投",
+    "Dec.": "十種競技", "Hept.": "七種競技", "Pent.": "五種競技",
+    "Marathon": "マラソン", "HM": "ハーフマラソン", "20km W": "20km競歩", "35km W": "35km競歩", "50km W": "50km競歩"
+}
+# カテゴリ (表示順)
+CATEGORIES_JP = [
+    "短距離・ハードル・リレー", "中長距離・障害", "跳躍", "投てき",
+    "競歩（トラック）", "ロード（長距離・競歩）", "混成競技"
+]
+CATEGORIES_EN = [
+    "Sprints, Hurdles & Relays", "Middle/Long Distance", "Jumps", "Throws",
+    "Race Walking (Track)", "Road Running & Walking", "Combined Events"
+]
+# 並び順指定
+CUSTOM_SORT_ORDER = [
+    "100m", "200m", "400m", "800m", "1500m", "5000m", "10000m",
+    "110mH", "100mH", "400mH", "3000m SC",
+    "HJ", "PV", "LJ", "TJ", "SP", "DT", "HT", "JT",
+    "Dec.", "Hept.", "Pent.", "Marathon", "HM", "20km W"
+]
+OLYMPIC_EVENTS_FOR_COMPARE = [
+    "100m", "200m", "400m", "800m", "1500m", "5000m", "10000m",
+    "110mH", "100mH", "400mH", "3000m SC",
+    "HJ", "PV", "LJ", "TJ", "SP", "DT", "HT", "JT", "Marathon", "20km W"
+]
+
+def get_display_name(raw_name, lang_code):
+    base_name = raw_name.replace(" sh", " (ST)")
+    if lang_code == "日本語":
+        return EVENT_TRANSLATION_JP.get(raw_name, base_name)
+    return base_name
+
+def classify_event(event_name_jp):
+    name = event_name_jp
+    if "種競技" in name: return "混成競技"
+    if "跳" in name and "競歩" not in name: return "跳躍"
+    if "投" in name: return "投てき"
+    if "m競歩" in name and "km" not in name and "マラソン" not in name: return "競歩（トラック）"
+    if "ロード" in name or "マラソン" in name or "km競歩" in name: return "ロード（長距離・競歩）"
+    if any(k in name for k in ["800m", "1000m", "1500m", "2000m", "3000m", "5000m", "10000m", "マイル", "障害"]): return "中長距離・障害"
+    return "短距離・ハードル・リレー"
+
+def classify_event_en(event_name_en):
+    name = event_name_en.lower()
+    if "dec" in name or "hept" in name or "pent" in name: return "Combined Events"
+    if any(k in name for k in ["hj", "pv", "lj", "tj", "standing"]) and "standing" not in name: return "Jumps"
+    if any(k in name for k in ["sp", "dt", "ht", "jt", "wt"]): return "Throws"
+    if "mw" in name and "km" not in name: return "Race Walking (Track)"
+    if any(k in name for k in ["marathon", "hm", "km", "road", "miles"]): return "Road Running & Walking"
+    if any(k in name for k in ["800m", "1500m", "3000m", "5000m", "10000m", "mile", "sc"]): return "Middle/Long Distance"
+    return "Sprints, Hurdles & Relays"
+
+# 距離 (m) の読み取り。列名の "10,000mW" / "35 km W" / "2 Miles sh" などの表記ゆれを吸収する
+MILE_M = 1609.344
+_DISTANCE_RULES = [
+    (re.compile(r"^(\d+)x(\d+)m"), lambda m: int(m.group(1)) * int(m.group(2))),
+    (re.compile(r"^(\d+)km"), lambda m: int(m.group(1)) * 1000),
+    (re.compile(r"^(\d+)miles?"), lambda m: int(m.group(1)) * MILE_M),
+    (re.compile(r"^mile"), lambda m: MILE_M),
+    (re.compile(r"^(\d+)m"), lambda m: int(m.group(1))),
+]
+
+def event_distance(event_name):
+    """種目の距離 (m)。距離を持たない種目 (跳躍・投てき・混成) は None"""
+    name = re.sub(r"[\s,.]", "", event_name.lower())
+    if name.startswith(("hm", "halfmarathon")): return 21097.5
+    if name.startswith(("marathon", "marw")): return 42195.0
+    for pattern, metres in _DISTANCE_RULES:
+        m = pattern.match(name)
+        if m: return float(metres(m))
+    return None
+
+def get_event_type(event_name):
+    name = event_name.lower().strip()
+    if "dec" in name or "hept" in name or "pent" in name or "pts" in name: return "score"
+    if any(k in name for k in ['hj', 'pv', 'lj', 'tj', 'sp', 'dt', 'ht', 'jt', 'shot', 'disc', 'jave', 'hamm', 'jump', 'throw', 'wt']): return "field"
+    if "4x" in name: return "time_ms"
+    # 距離で入力形式を決める (600m までは秒、15km 未満は分:秒、それ以上は時:分:秒)
+    distance = event_distance(name)
+    if distance is None: return "time_s"
+    if distance <= 600: return "time_s"
+    if distance < 15000: return "time_ms"
+    return "time_hms"
+
+def is_higher_better(mode):
+    # フィールド種目と混成(得点)は記録が大きいほど高得点、トラック系は小さいほど高得点
+    return mode in ("field", "score")
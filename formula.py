@@ -0,0 +1,165 @@
+"""採点表から当てはめた係数式による採点
+
+    python formula.py [--data-dir .] [--out coefficients.json]
+
+世界陸連の採点表は種目ごとに points = a·(x + b)² + c で作られている。
+表の全行から (a, b, c) を最小二乗で当てはめ、係数だけを保持して閉形式で採点する。
+表の行と行の間の記録にも連続値で答えられる。表とのずれは種目ごとに max_dev で確認できる。
+二次式で表せない列 (a <= 0 になる、または max_dev が MAX_USABLE_DEV を超える) は
+係数を残すが採点には使わない (score / performance_for は ValueError)。
+"""
+import argparse
+import json
+
+import numpy as np
+
+from events import get_event_type, is_higher_better
+
+# ==========================================
+# ★ 係数の当てはめ
+# ==========================================
+MAX_USABLE_DEV = 5     # 採点に使う式の表との最大差 (点)
+
+
+class EventFormula:
+    """1種目分の係数 points = a·(x + b)² + c"""
+
+    __slots__ = ("event", "a", "b", "c", "higher_is_better", "lo", "hi", "max_dev", "exact")
+
+    def __init__(self, event, a, b, c, lo, hi, max_dev, exact):
+        self.event = event
+        self.a, self.b, self.c = float(a), float(b), float(c)
+        self.higher_is_better = is_higher_better(get_event_type(event))
+        self.lo, self.hi = float(lo), float(hi)   # 当てはめに使った記録の範囲
+        self.max_dev = int(max_dev)                # 表の得点との最大差 (点)
+        self.exact = float(exact)                  # 表と一致した行の割合
+
+    @property
+    def usable(self):
+        """二次式で表を再現できている (下に凸で、表とのずれが小さい)"""
+        return self.a > 0 and self.max_dev <= MAX_USABLE_DEV
+
+    def _check(self):
+        if not self.usable:
+            raise ValueError(f"no usable formula for {self.event!r} (a={self.a:.3g}, max_dev={self.max_dev})")
+
+    def raw(self, x):
+        """連続値の得点 (丸め前)。頂点より不利な側は最小値 c に張り付ける"""
+        x = np.asarray(x, dtype=np.float64)
+        if self.higher_is_better:
+            x = np.maximum(x, -self.b)
+        else:
+            x = np.minimum(x, -self.b)
+        return self.a * (x + self.b) ** 2 + self.c
+
+    def score(self, x):
+        self._check()
+        return self._score(x)
+
+    def _score(self, x):
+        return np.maximum(np.rint(self.raw(x)), 0).astype(np.int32)
+
+    def performance_for(self, points):
+        """得点 → 記録 (式の逆関数)。届かない得点は NaN"""
+        self._check()
+        with np.errstate(invalid="ignore"):
+            r = np.sqrt((np.asarray(points, dtype=np.float64) - self.c) / self.a)
+        return -self.b + r if self.higher_is_better else -self.b - r
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in ("a", "b", "c", "lo", "hi", "max_dev", "exact")}
+
+
+def fit_event(event, points, values):
+    """表の 1 列 (得点, 記録) から係数を当てはめる。有効な行が 3 行未満なら None"""
+    ok = ~np.isnan(values)
+    x = np.asarray(values, dtype=np.float64)[ok]
+    p = np.asarray(points, dtype=np.float64)[ok]
+    if len(x) < 3:
+        return None
+    # 記録の値域が種目ごとに大きく違うので、正規化した多項式で当てはめてから元の単位に戻す
+    c0, c1, c2 = np.polynomial.Polynomial.fit(x, p, 2).convert().coef
+    a = c2
+    b = c1 / (2 * c2)
+    c = c0 - c1 * c1 / (4 * c2)
+    formula = EventFormula(event, a, b, c, x.min(), x.max(), 0, 0)
+    dev = np.abs(formula._score(x) - p)
+    formula.max_dev = int(dev.max())
+    formula.exact = float((dev == 0).mean())
+    return formula
+
+
+class FormulaTable:
+    """性別ごとの係数の集まり。採点表の CSV が無くても係数だけで採点できる"""
+
+    def __init__(self, formulas):
+        self.formulas = formulas
+
+    def __contains__(self, event):
+        """採点に使える式がある種目か"""
+        return event in self.formulas and self.formulas[event].usable
+
+    def __getitem__(self, event):
+        return self.formulas[event]
+
+    def score(self, event, x):
+        return self.formulas[event].score(x)
+
+    def performance_for(self, event, points):
+        return self.formulas[event].performance_for(points)
+
+    def report(self):
+        """種目ごとの表とのずれ (max_dev 降順)。(種目, max_dev, 一致率, 採点に使えるか)"""
+        return sorted(((e, f.max_dev, f.exact, f.usable) for e, f in self.formulas.items()), key=lambda r: -r[1])
+
+    def to_dict(self):
+        return {e: f.to_dict() for e, f in self.formulas.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({
+            e: EventFormula(e, d["a"], d["b"], d["c"], d["lo"], d["hi"], d["max_dev"], d["exact"])
+            for e, d in data.items()
+        })
+
+
+def fit_table(table):
+    formulas = {}
+    for j, event in enumerate(table.columns):
+        f = fit_event(event, table.points, table.values[j])
+        if f is not None:
+            formulas[event] = f
+    return FormulaTable(formulas)
+
+
+def save_coefficients(path, tables):
+    """{性別: FormulaTable} を JSON に保存する"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({g: t.to_dict() for g, t in tables.items()}, f, ensure_ascii=False, indent=1)
+
+
+def load_coefficients(path):
+    with open(path, encoding="utf-8") as f:
+        return {g: FormulaTable.from_dict(d) for g, d in json.load(f).items()}
+
+
+def main(argv=None):
+    from engine import GENDERS, ScoringEngine
+
+    parser = argparse.ArgumentParser(description="Fit a*(x+b)^2+c scoring formulas to the tables and report deviations.")
+    parser.add_argument("--data-dir", default=".")
+    parser.add_argument("--out", help="write coefficients as JSON")
+    args = parser.parse_args(argv)
+
+    engine = ScoringEngine(args.data_dir)
+    tables = {g: fit_table(engine.table(g)) for g in GENDERS if engine.has_table(g)}
+    for g, t in tables.items():
+        print(f"== {g} ==")
+        for event, max_dev, exact, usable in t.report():
+            print(f"  {event:<14} max_dev {max_dev:4d} pts  exact {exact:6.1%}{'' if usable else '  (not used)'}")
+    if args.out:
+        save_coefficients(args.out, tables)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""処理時間の計測とキャッシュのヒット数 (プロセス内の集計)
+
+    with metrics.span("lookup"):
+        ...
+    metrics.count("catalogue.hit")
+
+集計は metrics.snapshot() / prometheus_text() / json_lines() で取り出す (プロセス全体の合計)。
+1 回の処理 (Streamlit の 1 回の実行など) の区間だけが欲しいときは、最初に run = metrics.collect() とし、
+同じスレッドでその後に記録した区間を run (list) から読む。
+logging の "scoring.metrics" を DEBUG にすると、区間ごとに JSON 1 行のログも出す。
+環境変数 SCORING_METRICS=0 で無効化でき、その場合 span() は何もしない共有オブジェクトを返す。
+"""
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("SCORING_METRICS", "1") != "0"
+# Prometheus のヒストグラムの上限 (秒)
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+logger = logging.getLogger("scoring.metrics")
+
+# ==========================================
+# ★ 集計
+# ==========================================
+_lock = threading.Lock()
+_spans = {}        # 名前 → [回数, 合計秒, 最大秒, バケットごとの回数...]
+_counters = {}
+# 実行ごとの収集先 (collect() で設定した list)。スレッド・コンテキストごとに別なので他の利用者の区間は混ざらない
+_collector = contextvars.ContextVar("scoring_metrics_collector", default=None)
+
+
+def record(name, elapsed):
+    """区間の処理時間 (秒) を 1 件記録する"""
+    if not ENABLED:
+        return
+    with _lock:
+        s = _spans.get(name)
+        if s is None:
+            s = _spans[name] = [0, 0.0, 0.0] + [0] * len(BUCKETS)
+        s[0] += 1
+        s[1] += elapsed
+        if elapsed > s[2]: s[2] = elapsed
+        i = bisect.bisect_left(BUCKETS, elapsed)
+        if i < len(BUCKETS): s[3 + i] += 1
+    run = _collector.get()
+    if run is not None:
+        run.append((name, elapsed))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({"span": name, "seconds": round(elapsed, 6)}))
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    """with 文で囲んだ区間の処理時間を name で集計する"""
+    return _Span(name) if ENABLED else _NO_SPAN
+
+
+def timed(name):
+    """関数全体を span で囲むデコレータ"""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def count(name, n=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def collect():
+    """これ以降に現在のスレッド (コンテキスト) で記録した区間を集める list [(名前, 秒)] を返す"""
+    run = []
+    _collector.set(run)
+    return run
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+# ==========================================
+# ★ 出力
+# ==========================================
+def snapshot():
+    """{"spans": {名前: {count, total, mean, max}}, "counters": {名前: 値}}"""
+    with _lock:
+        spans = {k: list(v) for k, v in _spans.items()}
+        counters = dict(_counters)
+    return {
+        "spans": {k: {"count": v[0], "total": v[1], "mean": v[1] / v[0], "max": v[2]} for k, v in sorted(spans.items())},
+        "counters": dict(sorted(counters.items())),
+    }
+
+
+def json_lines():
+    """区間・カウンタを 1 行 1 件の JSON で返す (構造化ログ用)"""
+    snap = snapshot()
+    now = round(time.time(), 3)
+    lines = [json.dumps({"ts": now, "span": k, **v}) for k, v in snap["spans"].items()]
+    lines += [json.dumps({"ts": now, "counter": k, "value": v}) for k, v in snap["counters"].items()]
+    return "\n".join(lines) + "\n"
+
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def prometheus_text():
+    """Prometheus のテキスト形式 (span はヒストグラム、カウンタは counter)"""
+    with _lock:
+        spans = {k: list(v) for k, v in _spans.items()}
+        counters = dict(_counters)
+    out = []
+    if spans:
+        out += ["# HELP scoring_span_seconds Time spent in instrumented sections.",
+                "# TYPE scoring_span_seconds histogram"]
+    for name, s in sorted(spans.items()):
+        label = f'span="{name}"'
+        cum = 0
+        for b, c in zip(BUCKETS, s[3:]):
+            cum += c
+            out.append(f'scoring_span_seconds_bucket{{{label},le="{b}"}} {cum}')
+        out.append(f'scoring_span_seconds_bucket{{{label},le="+Inf"}} {s[0]}')
+        out.append(f"scoring_span_seconds_sum{{{label}}} {s[1]:.9f}")
+        out.append(f"scoring_span_seconds_count{{{label}}} {s[0]}")
+    for name, v in sorted(counters.items()):
+        metric = f"scoring_{_metric_name(name)}_total"
+        out += [f"# TYPE {metric} counter", f"{metric} {v}"]
+    return "\n".join(out) + "\n"
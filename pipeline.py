@@ -0,0 +1,109 @@
+"""画面の再実行ごとに繰り返す計算を段階ごとにメモ化する
+
+Streamlit はウィジェットを操作するたびにスクリプト全体を再実行する。
+検索・前後スコア表の整形・同得点比較を、それぞれの本当の入力だけをキーにして保持し、
+入力が変わった段階だけを計算し直す。
+  (性別, 種目, 版)            → 種目インデックス (engine 側で構築済み)
+  (性別, 種目, 記録, 版)       → 検索結果 (MatchResult)
+  (検索結果, 言語)             → 前後スコア表の行
+  (性別, 得点, 種目, 言語, 版) → 同得点比較
+キーに採点表の版を含めるので、新しい版に切り替わると自然に計算し直す。
+キーの版と計算に使う表は同じスナップショットから取る (途中で表が切り替わっても食い違わない)。
+"""
+import threading
+from collections import OrderedDict
+
+import metrics
+from records import format_display_record
+
+# ==========================================
+# ★ メモ化
+# ==========================================
+STAGE_CACHE_SIZE = 256
+
+
+class StageCache:
+    """1 つの段階の結果を入力をキーに保持する LRU (プロセス内の全セッションで共有)"""
+
+    def __init__(self, name, maxsize=STAGE_CACHE_SIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                metrics.count(f"pipeline.{self.name}.hit")
+                return self._data[key]
+        metrics.count(f"pipeline.{self.name}.miss")
+        with metrics.span(f"pipeline.{self.name}"):
+            value = compute()
+        with self._lock:
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_match_cache = StageCache("match")
+_nearby_cache = StageCache("nearby")
+_equivalents_cache = StageCache("equivalents")
+
+
+# ==========================================
+# ★ 各段階
+# ==========================================
+class MatchResult:
+    """1 回の検索結果 (表示に必要なものだけ)"""
+
+    __slots__ = ("key", "mode", "score", "record", "pos", "points", "records")
+
+    def __init__(self, key, mode, score, record, pos, points, records):
+        self.key = key
+        self.mode = mode
+        self.score = score
+        self.record = record
+        self.pos = pos            # points / records の中での該当行
+        self.points = points      # 前後スコア表の範囲の得点
+        self.records = records    # 同じ範囲の採点表の記録
+
+
+def match(engine, gender, event, value):
+    """記録 → 検索結果。種目にデータが無ければ ValueError"""
+    snap = engine.snapshot(gender)
+    key = (gender, event, float(value), snap.version)
+
+    def compute():
+        idx, pos = engine.match(gender, event, value, snap)
+        window = idx.nearby(pos)
+        return MatchResult(key, idx.mode, int(idx.points[pos]), str(idx.records[pos]), pos - window.start,
+                           [int(p) for p in idx.points[window]], [str(r) for r in idx.records[window]])
+    return _match_cache.get(key, compute)
+
+
+def nearby_rows(result, lang_code):
+    """前後スコア表の行 ([{"Score", "Record"}])。該当行には印を付ける"""
+    def compute():
+        return [{"Score": f"{'👉 ' if i == result.pos else ''}{p}",
+                 "Record": format_display_record(r, result.mode, lang_code)}
+                for i, (p, r) in enumerate(zip(result.points, result.records))]
+    return _nearby_cache.get((result.key, lang_code), compute)
+
+
+def equivalents(engine, gender, score, events, lang_code):
+    """同じ得点の各種目記録 {種目: 整形済みの記録}"""
+    events = tuple(events)
+    snap = engine.snapshot(gender)
+    key = (gender, int(score), events, lang_code, snap.version)
+    return _equivalents_cache.get(key, lambda: engine.equivalents(gender, score, list(events), lang_code, snap))
+
+
+def clear():
+    for cache in (_match_cache, _nearby_cache, _equivalents_cache):
+        cache.clear()
@@ -0,0 +1,181 @@
+"""得点 → 各種目の記録の逆引きインデックス
+
+    python points_index.py M -o equivalence_M.csv [--lang English] [--numeric]
+    python points_index.py M -o progression_M.csv --range 1000 1200 10 [--events 400m 800m]
+
+得点をそのまま行番号にした (最大得点 + 1) × 種目数 の密な配列を持ち、
+同じ得点の他種目記録や「得点 ±k」の範囲をスライス 1 回で取り出す。
+目標得点 → 必要な記録 (逆引き) は「その得点以上になる最も低い得点の行」を
+種目ごとに前計算しておき、得点の並び × 種目の表を添字参照 1 回で作る。
+記録の文字列は採点表の固定長配列 (種目 × 行) をそのまま参照し、
+取り出したセルだけを str にして表示用に整形する (表全体の文字列オブジェクトは作らない)。
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from events import get_event_type
+from records import format_display_record
+
+# ==========================================
+# ★ 得点で引くインデックス
+# ==========================================
+
+
+class PointsIndex:
+
+    def __init__(self, table):
+        self.columns = list(table.columns)
+        self._column_pos = {c: j for j, c in enumerate(self.columns)}
+        points = np.asarray(table.points, dtype=np.int64)
+        self.max_points = int(points.max()) if len(points) else 0
+
+        # row_of[p] = 得点 p の行 (無ければ -1)。同じ得点が複数あれば先頭の行
+        row_of = np.full(self.max_points + 1, -1, dtype=np.int64)
+        valid = np.flatnonzero(points >= 0)[::-1]
+        row_of[points[valid]] = valid
+        has_row = row_of >= 0
+        self.row_of = row_of
+        self.has_row = has_row
+
+        n_events = len(self.columns)
+        self.values = np.full((self.max_points + 1, n_events), np.nan)
+        self.values[has_row] = np.asarray(table.values).T[row_of[has_row]]
+        self._records = np.asarray(table.records)     # 種目 × 行 (固定長の bytes / str)
+
+        # at_least[p, j] = 種目 j で得点 p 以上になる最も低い得点 (記録が "-" の得点は飛ばす)。無ければ -1
+        dash = "-" if self._records.dtype.kind == "U" else b"-"
+        present = np.zeros((self.max_points + 1, n_events), dtype=bool)
+        present[has_row] = (self._records != dash).T[row_of[has_row]]
+        nxt = np.where(present, np.arange(self.max_points + 1)[:, None], self.max_points + 1)
+        nxt = np.minimum.accumulate(nxt[::-1], axis=0)[::-1]
+        self.at_least = np.where(nxt > self.max_points, -1, nxt).astype(np.int32)
+
+        self._modes = [get_event_type(c) for c in self.columns]
+
+    def _cols(self, events):
+        if events is None:
+            return list(range(len(self.columns))), self.columns
+        events = [e for e in events if e in self._column_pos]
+        return [self._column_pos[e] for e in events], events
+
+    def _band(self, points, k):
+        lo = max(0, int(points) - k)
+        hi = min(self.max_points, int(points) + k)
+        return lo, hi
+
+    def records(self, rows, cols, lang_code=None):
+        """得点 rows × 種目の位置 cols (同じ形に broadcast する) の記録 (object 配列)
+
+        lang_code が None なら表の文字列 (行の無い得点・範囲外は "-")、
+        指定すれば表示用に整形した文字列 ("-" は None)。
+        """
+        rows, cols = np.broadcast_arrays(np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.intp))
+        src = np.where((rows >= 0) & (rows <= self.max_points), self.row_of[np.clip(rows, 0, self.max_points)], -1)
+        if self._records.shape[1] == 0:
+            src = np.full(src.shape, -1)
+        out = np.empty(src.shape, dtype=object)
+        out[...] = "-"
+        ok = src >= 0
+        if ok.any():
+            out[ok] = self._records[cols[ok], src[ok]].astype(str)
+        if lang_code is None:
+            return out
+        with metrics.span("points_index.format"):
+            fmt = np.full(out.shape, None, dtype=object)
+            for idx in zip(*np.nonzero(out != "-")):
+                fmt[idx] = format_display_record(out[idx], self._modes[cols[idx]], lang_code)
+        return fmt
+
+    # --- 検索 ---
+    def equivalents(self, points, events=None, lang_code=None):
+        """得点 points の各種目記録を {種目: 記録} で返す (lang_code 指定時は整形済み)"""
+        points = int(points)
+        if not 0 <= points <= self.max_points:
+            return {}
+        pos, events = self._cols(events)
+        row = self.records(points, pos, lang_code)
+        return {e: r for e, r in zip(events, row) if r is not None and r != "-"}
+
+    def band(self, points, k, events=None, lang_code=None):
+        """得点 points ± k の範囲を DataFrame (index: 得点の降順) で返す"""
+        lo, hi = self._band(points, k)
+        pos, events = self._cols(events)
+        rows = np.arange(hi, lo - 1, -1)
+        rows = rows[self.has_row[rows]]
+        data = self.records(rows[:, None], np.asarray(pos)[None, :], lang_code)
+        return pd.DataFrame(data, index=pd.Index(rows, name="Points"), columns=events)
+
+    def band_values(self, points, k, events=None):
+        """得点 points ± k の数値 (秒 / メートル) を (行数, 種目数) の配列で返す"""
+        lo, hi = self._band(points, k)
+        pos, _ = self._cols(events)
+        return self.values[hi:lo - 1 if lo else None:-1][:, pos]
+
+    def required(self, points, events=None, lang_code=None):
+        """目標得点 → 各種目の必要な記録を {種目: (実際の得点, 記録)} で返す (届かない種目は除く)"""
+        points = max(int(points), 0)
+        if points > self.max_points:
+            return {}
+        pos, events = self._cols(events)
+        rows = self.at_least[points, pos]
+        data = self.records(rows, pos, lang_code)
+        return {e: (int(r), d) for e, r, d in zip(events, rows, data) if r >= 0}
+
+    def progression(self, targets, events=None, lang_code=None, numeric=False):
+        """目標得点の並び × 種目の必要記録表 (DataFrame, index: 目標得点)
+
+        各セルは「その得点以上になる最も低い記録」。届かないセルは None (numeric では NaN)。
+        """
+        targets = np.asarray(targets, dtype=np.int64)
+        pos, events = self._cols(events)
+        rows = self.at_least[np.clip(targets, 0, self.max_points)][:, pos]
+        rows = np.where((targets > self.max_points)[:, None], -1, rows)
+        if numeric:
+            data = self.values[rows, pos]
+            data[rows < 0] = np.nan
+        else:
+            data = self.records(rows, pos, lang_code)
+            data[rows < 0] = None
+            if lang_code is None:
+                data[data == "-"] = None
+        return pd.DataFrame(data, index=pd.Index(targets, name="Points"), columns=events)
+
+    def matrix(self, events=None, lang_code=None, numeric=False):
+        """全得点 × 種目の換算表 (コーチング用ダッシュボード向け)"""
+        pos, events = self._cols(events)
+        rows = np.flatnonzero(self.has_row)[::-1]
+        if numeric:
+            data = self.values[np.ix_(rows, pos)]
+        else:
+            data = self.records(rows[:, None], np.asarray(pos)[None, :], lang_code)
+        return pd.DataFrame(data, index=pd.Index(rows, name="Points"), columns=events)
+
+
+def main(argv=None):
+    from engine import ScoringEngine
+
+    parser = argparse.ArgumentParser(description="Export the cross-event equivalence matrix (points x events).")
+    parser.add_argument("gender", choices=["M", "W"])
+    parser.add_argument("-o", "--output", required=True, help="output CSV")
+    parser.add_argument("--events", nargs="*", help="limit to these event columns")
+    parser.add_argument("--lang", choices=["English", "日本語"], help="format records for display")
+    parser.add_argument("--numeric", action="store_true", help="write seconds / metres instead of table strings")
+    parser.add_argument("--range", nargs=3, type=int, metavar=("FROM", "TO", "STEP"),
+                        help="write a progression table (required mark per target score) instead of the full matrix")
+    parser.add_argument("--data-dir", default=".")
+    args = parser.parse_args(argv)
+
+    index = ScoringEngine(args.data_dir).points_index(args.gender)
+    if args.range:
+        start, stop, step = args.range
+        df = index.progression(np.arange(start, stop + (1 if step > 0 else -1), step), args.events, args.lang, args.numeric)
+    else:
+        df = index.matrix(args.events, args.lang, args.numeric)
+    df.to_csv(args.output, encoding="utf-8-sig")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+from events import get_event_type
+
+# ==========================================
+# ★ 記録文字列の解析
+# ==========================================
+# 表示用の単位
+RECORD_UNITS = {
+    "日本語": {"s": "秒", "m": "m"},
+    "English": {"s": "s", "m": "m"},
+}
+
+def parse_record_from_csv(record_str):
+    if pd.isna(record_str) or str(record_str).strip() in ["-", ""]: return None
+    s = str(record_str).strip()
+    try:
+        if ":" in s:
+            parts = s.split(":")
+            if len(parts) == 3: return float(parts[0])*3600 + float(parts[1])*60 + float(parts[2])
+            elif len(parts) == 2: return float(parts[0])*60 + float(parts[1])
+        return float(s)
+    except: return None
+
+def format_display_record(val, mode, lang_code):
+    if pd.isna(val) or val == "-" or val == "": return "-"
+    u_s = RECORD_UNITS[lang_code]["s"]
+    u_m = RECORD_UNITS[lang_code]["m"]
+    if mode == "time_s":
+        try: return f"{float(val):.2f}{u_s}"
+        except: return f"{val}{u_s}"
+    elif mode == "field": return f"{val}{u_m}"
+    return str(val)
+
+# ==========================================
+# ★ 採点表全体の一括解析 (ベクトル化)
+# ==========================================
+_POW10 = 10.0 ** np.arange(24)
+_MAX_DIGITS = 15
+_SECONDS_PER_DAY = 86400.0
+_HOURS_AMBIGUOUS = 10     # これ以上の "hh:mm:00" は "mm:ss" が Excel で時刻化されたもの
+
+def _parse_record_bytes(cells, strict_commas=False):
+    """固定長バイト列の配列を右から 1 文字ずつ走査し、全セルを同時に数値化する
+
+    戻り値は (値, コロンの数, [秒, 分, 時] の各フィールド値)。
+    parse_record_from_csv と同じ順序で加算するので結果はビット単位で一致する。
+    strict_commas=True ではカンマを整数部の桁区切り (後ろにちょうど 3 桁) としてだけ認め、
+    "10,52" のような小数点代わりのカンマは NaN にする (入力された記録用)。
+    """
+    n = len(cells)
+    width = cells.dtype.itemsize
+    chars = np.ascontiguousarray(cells.view(np.uint8).reshape(n, width).T)
+
+    valid = np.ones(n, dtype=bool)
+    # 桁数などの数え上げは int32 (入力された記録は長さの制限が無く、int8 では桁あふれする)
+    n_colon = np.zeros(n, dtype=np.int32)
+    fields = np.zeros((3, n))
+    digits = np.zeros(n)                     # フィールド内の数字を小数点抜きで並べた整数
+    n_digit = np.zeros(n, dtype=np.int32)
+    n_frac = np.zeros(n, dtype=np.int32)     # 小数点より右の桁数
+    n_dot = np.zeros(n, dtype=np.int32)
+    run = np.zeros(n, dtype=np.int32)        # 直前の区切り (, . :) から数えた数字の数
+    seen_comma = np.zeros(n, dtype=bool)
+    last_comma = np.zeros(n, dtype=bool)     # 最後に読んだ文字がカンマ (左に数字が無い)
+
+    def close_field(mask):
+        nonlocal valid
+        if strict_commas:
+            valid &= ~mask | ~last_comma
+        valid &= ~mask | ((n_digit > 0) & (n_dot <= 1) & (n_digit <= _MAX_DIGITS) & (n_frac <= _MAX_DIGITS))
+        # 桁数の多すぎるセルは上で無効にしてあるので、添字だけ表の範囲に収める
+        value = digits / _POW10[np.minimum(n_frac, _MAX_DIGITS)]
+        for k in range(3):
+            sel = mask & (n_colon == k)
+            fields[k][sel] = value[sel]
+
+    for j in range(width - 1, -1, -1):
+        c = chars[j]
+        is_digit = (c >= 48) & (c <= 57)
+        is_colon = c == 58
+        is_dot = c == 46
+        # 空白・桁区切りのカンマ・パディングは読み飛ばす。それ以外の文字 ("-" など) は NaN
+        valid &= is_digit | is_colon | is_dot | (c == 44) | (c == 32) | (c == 0)
+        digits += np.where(is_digit, c - 48.0, 0.0) * _POW10[np.minimum(n_digit, _MAX_DIGITS)]
+        n_frac = np.where(is_dot, n_digit, n_frac)
+        n_dot += is_dot
+        n_digit += is_digit
+        if strict_commas:
+            is_comma = c == 44
+            valid &= ~is_comma | (run == 3)
+            valid &= ~is_dot | ~seen_comma
+            seen_comma |= is_comma
+            last_comma = np.where(is_digit, False, last_comma | is_comma)
+            run = np.where(is_comma | is_dot | is_colon, 0, run + is_digit)
+        if is_colon.any():
+            close_field(is_colon)
+            n_colon += is_colon
+            digits[is_colon] = 0
+            n_digit[is_colon] = 0
+            n_frac[is_colon] = 0
+            n_dot[is_colon] = 0
+            seen_comma[is_colon] = False
+    valid &= n_colon <= 2
+    close_field(np.ones(n, dtype=bool))
+
+    values = fields[2] * 3600 + fields[1] * 60 + fields[0]
+    values[~valid] = np.nan
+    return values, n_colon, fields
+
+def _to_bytes(cells):
+    try:
+        return cells.astype("S")
+    except UnicodeEncodeError:
+        # ASCII 以外の文字を含むセルは "?" に置き換え、解析で NaN にする
+        return np.array([str(c).encode("ascii", "replace") for c in cells], dtype="S")
+
+def parse_records_frame(df, columns=None):
+    """採点表の種目列をまとめて float64 行列 (秒 / メートル, "-" は NaN) に変換する
+
+    元の CSV には Excel で時刻に変換されたセルが混じっているため、以下を補正する。
+      - ロード・競歩列の "34:00:00" (本来は 34:00) : 列内に 10 時間以上の記録が無ければ分:秒として読む
+      - フィールド列の "22:04:48" (本来は 0.92) : 1 日の割合としてメートルに戻す
+    """
+    if columns is None:
+        columns = [c for c in df.columns if c.lower() not in ["points", "pts", "score", "points_num"]]
+    columns = list(columns)
+    shape = (len(df), len(columns))
+    if not columns or not len(df):
+        return np.full(shape, np.nan)
+
+    # 列優先で 1 本の配列に並べて一括処理
+    cells = _to_bytes(df[columns].to_numpy(dtype=object).ravel(order="F"))
+    values, n_colon, fields = _parse_record_bytes(cells)
+    values = values.reshape(shape, order="F")
+    has_hours = (n_colon == 2).reshape(shape, order="F")
+    ambiguous = has_hours & ((fields[0] == 0) & (fields[2] >= _HOURS_AMBIGUOUS)).reshape(shape, order="F")
+
+    is_field = np.array([get_event_type(c) == "field" for c in columns])
+
+    # ロード・競歩: 曖昧でない 10 時間以上の記録がある列 (100 km など) はそのまま時間として扱う
+    long_event = np.where(has_hours & ~ambiguous, values, 0.0).max(axis=0) >= _HOURS_AMBIGUOUS * 3600
+    min_sec = ambiguous & ~long_event & ~is_field
+    values[min_sec] /= 60
+
+    # フィールド: 時刻化されたセルを 1 日の割合 (=メートル) に戻す
+    day_fraction = has_hours & is_field
+    values[day_fraction] /= _SECONDS_PER_DAY
+    return values
+
+def parse_record_array(cells):
+    """任意の記録列 (数値 or "m:ss.xx" などの文字列) を float64 配列に変換する。解析できないものは NaN
+
+    入力された記録用なので、カンマは桁区切り ("1,234") としてだけ認める ("10,52" は NaN)。
+    """
+    cells = np.asarray(cells)
+    if cells.dtype.kind in "iuf":
+        return cells.astype(np.float64)
+    if not len(cells):
+        return np.empty(0, dtype=np.float64)
+    return _parse_record_bytes(_to_bytes(cells), strict_commas=True)[0]
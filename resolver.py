@@ -0,0 +1,258 @@
+"""種目名の表記ゆれの解決 (一括採点・API の入力用)
+
+    python resolver.py M "long jump" 走幅跳 "3000m indoor" "20km race walk" "javlin"
+
+入力の種目名 (英語・日本語・採点表の列名の表記ゆれ) を採点表の列名に対応づける。
+  1. 正規化 (全角→半角、小文字化、空白・カンマ・ピリオドの除去、"metres" → "m" などの語の置き換え)
+     し、競歩・ハードル・障害の印は末尾にそろえ、ショートトラック ("sh" / "(ST)" / "indoor" / "室内" …) の指定は別の印として取り出す
+  2. 列名・表示名・日本語名・英語の正式名から作った別名の表 (正規化済み) を引く
+  3. 見つからなければ文字 3-gram の類似度であいまい検索する (数字・競歩・ハードル・障害の印が一致するものだけ)
+結果は入力の文字列ごとにメモ化するので、同じ種目名が何百万行あっても解決は辞書を 1 回引くだけになる。
+"""
+import argparse
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+from events import EVENT_TRANSLATION_JP, get_display_name, get_event_type
+
+# ==========================================
+# ★ 別名
+# ==========================================
+SH_SUFFIX = " sh"
+
+# 採点表の列名 (" sh" を除いた形) → 英語・日本語の別名
+EVENT_ALIASES = {
+    "HJ": ["high jump", "走り高跳", "走り高跳び", "走高跳び"],
+    "PV": ["pole vault", "棒高跳び"],
+    "LJ": ["long jump", "走り幅跳", "走り幅跳び", "走幅跳び"],
+    "TJ": ["triple jump", "三段跳び"],
+    "SP": ["shot put", "shot", "砲丸投げ"],
+    "DT": ["discus throw", "discus", "円盤投げ"],
+    "HT": ["hammer throw", "hammer", "ハンマー投げ"],
+    "JT": ["javelin throw", "javelin", "やり投げ", "槍投", "槍投げ"],
+    "Dec.": ["decathlon", "10種競技"],
+    "Hept.": ["heptathlon", "7種競技"],
+    "Pent.": ["pentathlon", "5種競技"],
+    "Marathon": ["full marathon", "フルマラソン"],
+    "HM": ["half marathon", "half"],
+    "MarW": ["marathon race walk", "マラソン競歩"],
+    "HMW": ["half marathon race walk", "ハーフマラソン競歩"],
+    "Mile": ["1 mile", "one mile", "1マイル"],
+    "2 Miles": ["two miles"],
+    "4x400mix": ["mixed 4x400m", "4x400m mixed", "4x400m mix", "男女混合4x400mr"],
+}
+
+# 正規化で置き換える語 (長いものから順に適用する。"kilometres" が "metres" の置き換えで崩れないように)
+_WORDS = sorted([
+    ("metres", "m"), ("meters", "m"), ("metre", "m"), ("meter", "m"), ("メートル", "m"),
+    ("kilometres", "km"), ("kilometers", "km"), ("キロ", "km"),
+    ("hurdles", "h"), ("hurdle", "h"), ("ハードル", "h"),
+    ("steeplechase", "sc"), ("steeple", "sc"), ("障害物", "sc"), ("障害", "sc"),
+    ("racewalking", "w"), ("race walking", "w"), ("walking", "w"),
+    ("racewalk", "w"), ("race walk", "w"), ("walk", "w"), ("競歩", "w"),
+    ("miles", "mile"), ("マイル", "mile"),
+    ("relay", ""), ("リレー", ""), ("road", ""), ("ロード", ""),
+    ("women's", ""), ("men's", ""), ("男子", ""), ("女子", ""),
+], key=lambda t: -len(t[0]))
+# ショートトラックの印
+_SHORT_TRACK = ["short track", "shorttrack", "indoors", "indoor", "(st)", "ショートトラック", "ショート", "室内"]
+_SH_END = re.compile(r"(?:\s|^)sh$")
+_STRIP = re.compile(r"[\s,._\-・()（）]")
+_DIGITS = re.compile(r"\d+")
+_WALK_END = re.compile(r"(?<!thro)w$")
+_HURDLES_END = re.compile(r"\dm?h$")
+_STEEPLE_END = re.compile(r"sc$")
+_MARKER_HEAD = re.compile(r"^(sc|w|h)(?=\d)(.*)$")
+
+
+def normalize_event_name(name):
+    """(正規化した種目名, ショートトラックか) を返す"""
+    s = unicodedata.normalize("NFKC", str(name)).lower().strip()
+    short_track = False
+    for word in _SHORT_TRACK:
+        if word in s:
+            s = s.replace(word, " ")
+            short_track = True
+    s = s.strip()
+    if _SH_END.search(s):
+        s = s[:-2]
+        short_track = True
+    s = s.replace("×", "x")
+    for word, repl in _WORDS:
+        s = s.replace(word, repl)
+    s = _STRIP.sub("", s)
+    s = _MARKER_HEAD.sub(r"\2\1", s)             # "walk 20km" → "20kmw" (印は末尾にそろえる)
+    s = re.sub(r"^(\d+)k(?=w?$)", r"\1km", s)   # "10k" → "10km"
+    if s.isdigit():
+        s += "m"
+    return s, short_track
+
+
+def event_markers(key):
+    """あいまい検索でも一致していなければならない部分 (数字, 競歩, ハードル, 障害)"""
+    return (tuple(_DIGITS.findall(key)), bool(_WALK_END.search(key)),
+            bool(_HURDLES_END.search(key)), bool(_STEEPLE_END.search(key)))
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ==========================================
+# ★ 解決
+# ==========================================
+FUZZY_THRESHOLD = 0.5
+CACHE_SIZE = 65536
+_MISSING = object()
+
+
+class ResolvedEvent:
+    """入力の種目名に対応する採点表の列"""
+
+    __slots__ = ("column", "mode", "short_track", "match", "similarity")
+
+    def __init__(self, column, mode, short_track, match, similarity=1.0):
+        self.column = column
+        self.mode = mode                  # events.get_event_type の入力形式
+        self.short_track = short_track
+        self.match = match                # "exact" / "alias" / "fuzzy"
+        self.similarity = similarity
+
+    def __repr__(self):
+        return f"ResolvedEvent({self.column!r}, {self.mode!r}, short_track={self.short_track}, match={self.match!r})"
+
+
+class EventResolver:
+    """1 つの採点表の列名に対する種目名の解決 (別名の表 + 3-gram のあいまい検索)"""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._column_set = set(self.columns)
+        self._aliases = {}                   # (正規化した名前, ショートトラックか) → 列名
+        self._grams = defaultdict(set)       # 3-gram → 別名のキー
+        self._key_grams = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+        for column in self.columns:
+            short_track = column.endswith(SH_SUFFIX)
+            base = column[:-len(SH_SUFFIX)] if short_track else column
+            names = [column, base, get_display_name(column, "English"), get_display_name(column, "日本語"),
+                     EVENT_TRANSLATION_JP.get(base, base)] + EVENT_ALIASES.get(base, [])
+            for name in names:
+                key, sh = normalize_event_name(name)
+                self._aliases.setdefault((key, sh or short_track), column)
+        for key in self._aliases:
+            grams = self._key_grams[key] = trigrams(key[0])
+            for g in grams:
+                self._grams[g].add(key)
+
+    def resolve(self, name):
+        """種目名 → ResolvedEvent (対応する列が無ければ None)"""
+        result = self._cache.get(name, _MISSING)
+        if result is not _MISSING:
+            return result
+        result = self._resolve(name)
+        with self._lock:
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+            self._cache[name] = result
+        return result
+
+    def resolve_many(self, names):
+        """種目名の並び → 列名のリスト (解決できないものは None)。ユニークな値だけを解決する"""
+        found = {}
+        out = []
+        for name in names:
+            if name not in found:
+                r = self.resolve(name)
+                found[name] = r.column if r else None
+            out.append(found[name])
+        return out
+
+    def _resolve(self, name):
+        if name is None or (isinstance(name, float) and name != name):
+            return None
+        raw = str(name).strip()
+        if raw in self._column_set:
+            return self._result(raw, "exact")
+        key, short_track = normalize_event_name(raw)
+        if not key:
+            return None
+        column = self._aliases.get((key, short_track))
+        # 屋内・屋外の片方にしか列の無い種目 (Pent. sh / 60m / HJ など) は、ショートトラックの指定が合わなくても対応づける
+        if column is None:
+            column = self._aliases.get((key, not short_track))
+        if column is not None:
+            return self._result(column, "alias")
+        return self._fuzzy(key, short_track)
+
+    def _fuzzy(self, key, short_track):
+        """3-gram の Dice 係数が最も高い別名。
+
+        綴りの誤りだけを拾うため、数字の部分 (100m と 200m)・競歩・ハードル・障害の印が異なるもの
+        ("100m hurdles" と 100m) や、長さが大きく違うもの ("standing long jump") は候補にしない。
+        """
+        grams = trigrams(key)
+        markers = event_markers(key)
+        shared = defaultdict(int)
+        for g in grams:
+            for cand in self._grams.get(g, ()):
+                shared[cand] += 1
+        scored = []
+        for cand, n in shared.items():
+            name, sh = cand
+            if event_markers(name) != markers or min(len(key), len(name)) * 3 < max(len(key), len(name)) * 2:
+                continue
+            sim = 2.0 * n / (len(grams) + len(self._key_grams[cand]))
+            # ショートトラックの指定が合わない列への対応づけは少し下げる
+            if sh != short_track:
+                sim -= 0.05
+            if sim >= FUZZY_THRESHOLD:
+                scored.append((sim, self._aliases[cand]))
+        if not scored:
+            return None
+        scored.sort(key=lambda t: -t[0])
+        best_sim, best = scored[0]
+        # 別の列が同じ類似度で並ぶ場合は決めない
+        if any(sim == best_sim and column != best for sim, column in scored[1:]):
+            return None
+        return self._result(best, "fuzzy", round(best_sim, 3))
+
+    def _result(self, column, match, similarity=1.0):
+        return ResolvedEvent(column, get_event_type(column), column.endswith(SH_SUFFIX), match, similarity)
+
+
+@lru_cache(maxsize=16)
+def _get_resolver(columns):
+    return EventResolver(columns)
+
+
+def get_resolver(columns):
+    """列名の並びごとに EventResolver を共有する (同じ列構成の版・スナップショットで使い回す)"""
+    return _get_resolver(tuple(columns))
+
+
+def main(argv=None):
+    from engine import GENDERS, ScoringEngine
+
+    parser = argparse.ArgumentParser(description="Resolve free-form event names to scoring-table columns.")
+    parser.add_argument("gender", choices=GENDERS)
+    parser.add_argument("names", nargs="+")
+    parser.add_argument("--data-dir", default=".")
+    args = parser.parse_args(argv)
+
+    resolver = ScoringEngine(args.data_dir).resolver(args.gender)
+    for name in args.names:
+        r = resolver.resolve(name)
+        if r is None:
+            print(f"{name}\t-")
+        else:
+            print(f"{name}\t{r.column}\t{r.mode}\t{'sh' if r.short_track else ''}\t{r.match}\t{r.similarity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import numpy as np
+
+from events import get_event_type, is_higher_better
+
+# ==========================================
+# ★ 種目ごとの検索インデックス
+# ==========================================
+NEARBY_ROWS = 3  # 前後スコア表に表示する行数 (片側)
+
+
+class EventIndex:
+    """1種目分の (得点, 記録) を得点の降順に並べた検索用インデックス"""
+
+    __slots__ = ("event", "mode", "points", "values", "records", "_keys", "_sign")
+
+    def __init__(self, event, mode, points, values, records):
+        self.event = event
+        self.mode = mode
+        self.points = points      # int32, 降順
+        self.values = values      # float64, 秒 or メートル
+        self.records = records    # 表示用の元の文字列
+        # 得点降順に並べた記録の累積 min/max を検索キーにする。
+        # 表に乱れ (単調でない行) があっても「条件を満たす最初の行」が
+        # 二分探索で求まり、従来の全行スキャンと同じ行を返す。
+        if is_higher_better(mode):
+            # フィールド: 入力値以下の最大記録
+            self._keys = -np.minimum.accumulate(values)
+            self._sign = -1.0
+        else:
+            # トラック: 入力値以上の最小記録（遅い方）
+            self._keys = np.maximum.accumulate(values)
+            self._sign = 1.0
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def empty(self):
+        return len(self.points) == 0
+
+    def lookup(self, value):
+        """該当行の位置を返す (配列を渡すとまとめて検索)。該当なしは最下位の行"""
+        pos = np.searchsorted(self._keys, self._sign * np.asarray(value, dtype=np.float64), side="left")
+        return np.minimum(pos, len(self.points) - 1)
+
+    def nearby(self, pos, rows=NEARBY_ROWS):
+        """前後 rows 行の範囲を slice で返す"""
+        return slice(max(0, pos - rows), min(len(self.points), pos + rows + 1))
+
+
+class ScoringIndex:
+    """性別ごとの採点表全体を種目列単位のインデックスにまとめたもの"""
+
+    def __init__(self, events):
+        self.events = events
+
+    def __getitem__(self, event):
+        return self.events[event]
+
+    def __contains__(self, event):
+        return event in self.events
+
+    def lookup(self, event, value):
+        idx = self.events[event]
+        pos = int(idx.lookup(value))
+        return idx, pos
+
+
+def build_event_index(event, points, values, records):
+    # 解析できた行だけを得点の降順に並べる
+    valid = ~np.isnan(values)
+    points = points[valid]
+    order = np.argsort(-points, kind="stable")
+    return EventIndex(event, get_event_type(event), points[order], values[valid][order], records[valid][order])
+
+
+def build_scoring_index(table):
+    points = np.asarray(table.points, dtype=np.int32)
+    return ScoringIndex({
+        e: build_event_index(e, points, np.asarray(table.values[j]), table.event_records(e))
+        for j, e in enumerate(table.columns)
+    })
@@ -0,0 +1,142 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from records import parse_records_frame
+
+# ==========================================
+# ★ 採点表のバイナリキャッシュ
+# ==========================================
+# 初回だけ CSV を解析し、数値列・得点・表示用文字列を .npy に保存する。
+# 2 回目以降は np.load(mmap_mode="r") で開くだけなので CSV の解析が不要になり、
+# 同じマシン上のワーカープロセスは OS のページキャッシュを共有する。
+CACHE_DIR_NAME = ".score_cache"
+CACHE_FORMAT = 1   # 解析ロジックを変えたら上げる (古いキャッシュを無効化)
+POINTS_COLUMNS = ["points", "pts", "score"]
+
+
+class ScoringTable:
+    """1 つの採点表ファイル (性別・版ごと) を列単位の配列で保持する"""
+
+    def __init__(self, source, points_col, columns, points, values, records, version=None):
+        self.source = source
+        self.version = version    # データ版の識別子 (キャッシュキー)。他のキャッシュのキーに使う
+        self.points_col = points_col
+        self.columns = list(columns)
+        self.points = points      # int32 (行数,)
+        self.values = values      # float64 (種目数, 行数) 秒 or メートル, "-" は NaN
+        self.records = records    # bytes/str (種目数, 行数) CSV の元の文字列
+        self._column_pos = {c: j for j, c in enumerate(self.columns)}
+
+    def __contains__(self, event):
+        return event in self._column_pos
+
+    def column_pos(self, event):
+        return self._column_pos[event]
+
+    def event_values(self, event):
+        return self.values[self._column_pos[event]]
+
+    def event_records(self, event):
+        return self.records[self._column_pos[event]].astype(str)
+
+    def record(self, row, event):
+        return str(self.records[self._column_pos[event], row].astype(str))
+
+    def rows_for_points(self, points):
+        return np.flatnonzero(self.points == points)
+
+
+def find_table_file(gender_prefix, data_dir="."):
+    # 日付入りのファイル名なので、ソートして最後が最新版
+    csv_files = sorted(glob.glob(os.path.join(data_dir, f"{gender_prefix}_ALL_*.csv")))
+    return csv_files[-1] if csv_files else None
+
+
+def parse_table_csv(path, version=None):
+    df = pd.read_csv(path, dtype=str)
+    p_col = [c for c in df.columns if c.lower() in POINTS_COLUMNS][0]
+    points = pd.to_numeric(df[p_col].str.replace(',', ''), errors='coerce').fillna(0).astype(np.int32).to_numpy()
+    columns = [c for c in df.columns if c != p_col]
+    values = np.ascontiguousarray(parse_records_frame(df, columns).T)
+    records = df[columns].fillna("-").to_numpy(dtype=str).T
+    try:
+        # 表はほぼ ASCII なので 1 文字 1 バイトで持つ
+        records = records.astype("S")
+    except UnicodeEncodeError:
+        pass
+    return ScoringTable(path, p_col, columns, points, values, records, version)
+
+
+def _cache_key(path):
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem, f"{stem}-v{CACHE_FORMAT}-{digest}-{os.stat(path).st_mtime_ns}"
+
+
+def _write_cache(table, cache_dir, key):
+    tmp = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
+        np.save(os.path.join(tmp, "points.npy"), table.points)
+        np.save(os.path.join(tmp, "values.npy"), table.values)
+        np.save(os.path.join(tmp, "records.npy"), table.records)
+        os.chmod(tmp, 0o755)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"source": os.path.basename(table.source), "points_col": table.points_col,
+                       "columns": table.columns}, f, ensure_ascii=False)
+        # ディレクトリごとの rename で公開するので、他プロセスが書きかけを読むことはない
+        os.rename(tmp, os.path.join(cache_dir, key))
+    except OSError:
+        # 書き込めない環境や、別プロセスが先に同じキャッシュを作った場合
+        if tmp: shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _read_cache(path, entry, version):
+    with open(os.path.join(entry, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    return ScoringTable(
+        path,
+        meta["points_col"],
+        meta["columns"],
+        np.load(os.path.join(entry, "points.npy"), mmap_mode="r"),
+        np.load(os.path.join(entry, "values.npy"), mmap_mode="r"),
+        np.load(os.path.join(entry, "records.npy"), mmap_mode="r"),
+        version,
+    )
+
+
+def _remove_stale(cache_dir, stem, key):
+    for entry in glob.glob(os.path.join(cache_dir, f"{stem}-v*")):
+        if os.path.basename(entry) != key:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def load_table(path, cache_dir=None):
+    """採点表 CSV をキャッシュ経由で読み込む (キャッシュはファイルのハッシュと更新時刻で識別)"""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    stem, key = _cache_key(path)
+    entry = os.path.join(cache_dir, key)
+    if not os.path.isdir(entry):
+        metrics.count("table_cache.miss")
+        with metrics.span("table.parse_csv"):
+            table = parse_table_csv(path, key)
+        _write_cache(table, cache_dir, key)
+        _remove_stale(cache_dir, stem, key)
+        if not os.path.isdir(entry):
+            # キャッシュを書けない環境 (読み取り専用など) では解析結果をそのまま使う
+            return table
+    else:
+        metrics.count("table_cache.hit")
+    with metrics.span("table.cache_read"):
+        return _read_cache(path, entry, key)
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+
+import metrics
+from formula import fit_table
+from points_index import PointsIndex
+from scoring_index import build_scoring_index
+from table_cache import find_table_file, load_table
+
+# ==========================================
+# ★ プロセス共有の採点表ストア (版の切り替え対応)
+# ==========================================
+# 性別ごとに「いま有効な版」のスナップショットを 1 つだけ持つ。
+# *_ALL_*.csv を一定間隔で確認し、新しい日付のファイルが置かれたら
+# 裏で読み込んでから参照を差し替える。処理中のリクエストは古い版を最後まで使える。
+CHECK_INTERVAL = 5.0   # 秒
+
+
+class TableSnapshot:
+    """1 つの版の採点表と、そこから作る検索構造一式 (読み取り専用)"""
+
+    def __init__(self, gender, path, signature, table):
+        self.gender = gender
+        self.path = path
+        self.signature = signature
+        self.table = table
+        self.version = table.version
+        with metrics.span("table.build_index"):
+            self.index = build_scoring_index(table)
+        self._points_index = None
+        self._formula = None
+        self._lock = threading.Lock()
+
+    @property
+    def points_index(self):
+        with self._lock:
+            if self._points_index is None:
+                with metrics.span("table.build_points_index"):
+                    self._points_index = PointsIndex(self.table)
+        return self._points_index
+
+    @property
+    def formula(self):
+        with self._lock:
+            if self._formula is None:
+                with metrics.span("table.fit_formula"):
+                    self._formula = fit_table(self.table)
+        return self._formula
+
+
+def _signature(path):
+    st = os.stat(path)
+    return (os.path.basename(path), st.st_mtime_ns, st.st_size)
+
+
+class TableStore:
+
+    def __init__(self, data_dir=".", check_interval=CHECK_INTERVAL):
+        self.data_dir = data_dir
+        self.check_interval = check_interval
+        self._snapshots = {}
+        self._checked = {}
+        self._build_lock = threading.Lock()
+
+    def get(self, gender):
+        """現在の版のスナップショットを返す。確認間隔を過ぎていればファイルの更新を確認する"""
+        snap = self._snapshots.get(gender)
+        if snap is None or time.monotonic() - self._checked.get(gender, 0.0) >= self.check_interval:
+            # 他のスレッドが読み込み中なら待たずに今の版を返す
+            snap = self.refresh(gender, wait=snap is None) or snap
+        return snap
+
+    def refresh(self, gender, wait=True):
+        """最新の *_ALL_*.csv を確認し、変わっていれば読み込んで差し替える"""
+        if not self._build_lock.acquire(blocking=wait):
+            return None
+        try:
+            self._checked[gender] = time.monotonic()
+            current = self._snapshots.get(gender)
+            path = find_table_file(gender, self.data_dir)
+            if path is None:
+                if current is None:
+                    raise FileNotFoundError(f"no {gender}_ALL_*.csv in {self.data_dir!r}")
+                return current
+            try:
+                sig = _signature(path)
+                if current is not None and current.signature == sig:
+                    return current
+                with metrics.span("table.load"):
+                    snap = TableSnapshot(gender, path, sig, load_table(path))
+            except Exception:
+                metrics.count("table_store.load_error")
+                # コピー途中のファイルなどで読めない場合は、次の確認まで今の版を使い続ける
+                if current is None:
+                    raise
+                return current
+            self._snapshots[gender] = snap
+            metrics.count("table_store.reload")
+            return snap
+        finally:
+            self._build_lock.release()
+
+    def versions(self):
+        return {g: s.version for g, s in self._snapshots.items()}